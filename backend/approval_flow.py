@@ -3,22 +3,131 @@ approval_flow.py — LLM-driven allocation decision + on-chain approveAid().
 
 After verifyEvent succeeds (status = EVENT_VERIFIED), this module makes
 the allocation decision and calls MissionControl.approveAid().
+
+The LLM is asked for schema-validated structured output. If the call fails
+or the reply does not validate, a deterministic local cost model is used
+instead, so approval never needs a second LLM round-trip and a pipeline is
+never left stuck at EVENT_VERIFIED.
 """
 
 import os
-import json
 import logging
+from enum import Enum
+from functools import lru_cache
 
+from pydantic import BaseModel, Field
 from langchain_groq import ChatGroq
 from chain import get_chain, send_tx, is_chain_configured, log_chain_event
 
 logger = logging.getLogger("aegis.approval")
 
+# Fold the allocation into the Judge call (one LLM call instead of two)
+ALLOCATE_IN_JUDGE = os.getenv("ALLOCATE_IN_JUDGE", "").lower() in ("1", "true", "yes")
+
+MIN_COST_USD = 20
+MAX_COST_USD = 500
+
+
+class ProviderType(str, Enum):
+    DRONE = "Drone"
+    GROUND_VEHICLE = "Ground Vehicle"
+    HUMAN_TEAM = "Human Team"
+
+
+class Verdict(str, Enum):
+    VALID = "VALID"
+    DECLINED = "DECLINED"
+
+
+class Allocation(BaseModel):
+    provider_type: ProviderType = Field(description="Who delivers the aid")
+    cost_usd: int = Field(ge=MIN_COST_USD, le=MAX_COST_USD, description="Estimated cost in whole USD")
+
+
+class JudgeDecision(BaseModel):
+    verdict: Verdict = Field(description="VALID or DECLINED")
+    allocation: Allocation | None = Field(default=None, description="Required when verdict is VALID")
+
+
+# ---------------------------------------------------------------------------
+# Deterministic fallback cost model
+# ---------------------------------------------------------------------------
+# Aid category → keywords, checked in order (first match wins)
+AID_CATEGORIES = [
+    ("medical", ["medic", "insulin", "injur", "bleed", "first aid", "medicine", "drug", "pill", "wound"]),
+    ("rescue", ["trapped", "rescue", "evacuat", "stuck", "collapsed", "missing"]),
+    ("shelter", ["shelter", "tent", "blanket", "cold", "roof", "homeless"]),
+    ("food_water", ["water", "food", "hungry", "thirst", "formula", "ration"]),
+]
+
+# Category → preferred provider
+CATEGORY_PROVIDER = {
+    "medical": ProviderType.DRONE,
+    "rescue": ProviderType.HUMAN_TEAM,
+    "shelter": ProviderType.GROUND_VEHICLE,
+    "food_water": ProviderType.GROUND_VEHICLE,
+    "general": ProviderType.DRONE,
+}
+
+# (provider, category) → cost in USD
+FALLBACK_COST_USD = {
+    (ProviderType.DRONE, "medical"): 80,
+    (ProviderType.DRONE, "food_water"): 60,
+    (ProviderType.DRONE, "general"): 50,
+    (ProviderType.GROUND_VEHICLE, "shelter"): 180,
+    (ProviderType.GROUND_VEHICLE, "food_water"): 120,
+    (ProviderType.HUMAN_TEAM, "rescue"): 400,
+    (ProviderType.HUMAN_TEAM, "medical"): 300,
+}
+FALLBACK_PROVIDER_COST_USD = {
+    ProviderType.DRONE: 60,
+    ProviderType.GROUND_VEHICLE: 150,
+    ProviderType.HUMAN_TEAM: 300,
+}
+
 
-async def run_approval(request_id: int, lat: float, lng: float, description: str, disaster_name: str) -> str | None:
+def classify_aid(description: str) -> str:
+    lower = description.lower()
+    for category, keywords in AID_CATEGORIES:
+        if any(kw in lower for kw in keywords):
+            return category
+    return "general"
+
+
+def fallback_allocation(description: str, provider_type: ProviderType | None = None) -> Allocation:
+    """Local, deterministic allocation used whenever the LLM cannot be trusted."""
+    category = classify_aid(description)
+    provider = provider_type or CATEGORY_PROVIDER[category]
+    cost = FALLBACK_COST_USD.get((provider, category), FALLBACK_PROVIDER_COST_USD[provider])
+    return Allocation(provider_type=provider, cost_usd=cost)
+
+
+@lru_cache(maxsize=1)
+def _llm() -> ChatGroq:
+    return ChatGroq(model="llama-3.3-70b-versatile", temperature=0.3, api_key=os.getenv("GROQ_API_KEY"))
+
+
+async def decide_allocation(lat: float, lng: float, description: str, disaster_name: str) -> Allocation:
+    """One structured LLM call; any failure falls back to the local cost model."""
+    prompt = (
+        f"A disaster has been verified at ({lat}, {lng}): {disaster_name}.\n"
+        f"The victim requested: {description}\n\n"
+        f"Recommend the provider type (Drone / Ground Vehicle / Human Team) and a realistic "
+        f"estimated cost in whole USD between {MIN_COST_USD} and {MAX_COST_USD}."
+    )
+    try:
+        structured = _llm().with_structured_output(Allocation, method="json_mode")
+        return await structured.ainvoke(prompt + '\nRespond in JSON: {"provider_type": "...", "cost_usd": 50}')
+    except Exception as e:
+        logger.warning(f"Structured allocation failed ({e}) — using fallback cost model")
+        return fallback_allocation(description)
+
+
+async def run_approval(request_id: int, allocation: Allocation) -> str | None:
     """
-    Run the LLM allocation decision and call approveAid() on-chain.
-    
+    Call approveAid() on-chain for an allocation already decided by the Judge
+    call or decide_allocation().
+
     Returns the tx hash on success, None on failure.
     """
     if not is_chain_configured():
@@ -26,34 +135,10 @@ async def run_approval(request_id: int, lat: float, lng: float, description: str
         return None
 
     try:
-        # LLM allocation decision (single call, NOT the full 5-agent debate)
-        groq_key = os.getenv("GROQ_API_KEY")
-        llm = ChatGroq(model="llama-3.3-70b-versatile", temperature=0.3, api_key=groq_key)
-
-        prompt = (
-            f"A disaster has been verified at ({lat}, {lng}): {disaster_name}.\n"
-            f"The victim requested: {description}\n\n"
-            f"Recommend:\n"
-            f"1. Provider type (Drone / Ground Vehicle / Human Team)\n"
-            f"2. Estimated cost in whole USD (realistic, between 20 and 500)\n\n"
-            f'Respond ONLY in JSON: {{"provider_type": "...", "cost_usd": 50}}'
-        )
-
-        res = llm.invoke(prompt)
-        raw = res.content.strip()
-
-        # Parse JSON from response (handle markdown code blocks)
-        if "```" in raw:
-            raw = raw.split("```")[1]
-            if raw.startswith("json"):
-                raw = raw[4:]
-            raw = raw.strip()
-
-        allocation = json.loads(raw)
-        cost_usd = int(allocation.get("cost_usd", 50))
-        provider_type = allocation.get("provider_type", "Drone")
+        cost_usd = allocation.cost_usd
+        provider_type = allocation.provider_type.value
 
-        logger.info(f"LLM allocation: {provider_type}, ${cost_usd} for request #{request_id}")
+        logger.info(f"Allocation: {provider_type}, ${cost_usd} for request #{request_id}")
 
         # Get provider address from env (fixed for demo)
         provider_address = os.getenv("PROVIDER_ADDRESS")
@@ -6,13 +6,15 @@ entity that signs and sends transactions on behalf of disaster victims.
 """
 
 import os
-import asyncio
 import time
+import random
+import asyncio
 import logging
 from functools import lru_cache
 
 from web3 import Web3
 from web3.middleware import ExtraDataToPOAMiddleware
+from web3.exceptions import TransactionNotFound
 from eth_account import Account
 
 logger = logging.getLogger("aegis.chain")
@@ -180,52 +182,202 @@ def is_chain_configured() -> bool:
 
 
 # ---------------------------------------------------------------------------
-# Transaction helper with retry
+# Transaction helper with failure-aware retry
 # ---------------------------------------------------------------------------
-def _send_tx_sync(contract_fn, *args, max_retries: int = 3):
+RECEIPT_TIMEOUT_SECONDS = 60
+RECEIPT_POLL_SECONDS = 2
+GAS_PRICE_MULTIPLIER = 1.2   # slight overpay for reliability
+FEE_BUMP_MULTIPLIER = 1.25   # nodes require >= 10% bump to replace a pending tx
+BACKOFF_BASE_SECONDS = 1
+BACKOFF_CAP_SECONDS = 16
+
+# Failure classes
+TX_REVERTED = "revert"
+TX_UNDERPRICED = "underpriced"
+TX_NONCE_TOO_LOW = "nonce_too_low"
+TX_ALREADY_KNOWN = "already_known"
+TX_TIMEOUT = "timeout"
+TX_UNKNOWN = "unknown"
+
+
+class TxReverted(RuntimeError):
+    """The transaction was mined but reverted — retrying cannot help."""
+
+
+class TxTimeout(RuntimeError):
+    """No receipt within RECEIPT_TIMEOUT_SECONDS — the tx may still be pending."""
+
+
+def classify_tx_error(error: Exception) -> str:
+    """Map a send/receipt failure onto a retry strategy."""
+    if isinstance(error, TxReverted):
+        return TX_REVERTED
+    if isinstance(error, TxTimeout):
+        return TX_TIMEOUT
+    msg = str(error).lower()
+    if "execution reverted" in msg or "revert" in msg:
+        return TX_REVERTED
+    if "underpriced" in msg or "fee too low" in msg or "less than block base fee" in msg:
+        return TX_UNDERPRICED
+    if "nonce too low" in msg or "nonce has already been used" in msg:
+        return TX_NONCE_TOO_LOW
+    if "already known" in msg or "known transaction" in msg:
+        return TX_ALREADY_KNOWN
+    return TX_UNKNOWN
+
+
+# Hand out oracle nonces locally so concurrent pipelines never share one —
+# a fee bump on a shared nonce would replace another pipeline's transaction.
+_nonce_lock = asyncio.Lock()
+_next_nonce: int | None = None
+_live_nonces: set = set()      # held by a send_tx call that is still running
+_released_nonces: set = set()  # definitively rejected, never reached the mempool
+
+
+async def _allocate_nonce(w3: Web3, address: str) -> int:
+    global _next_nonce
+    async with _nonce_lock:
+        chain_nonce = await asyncio.to_thread(w3.eth.get_transaction_count, address, "pending")
+
+        # Our counter is ahead of the chain with nothing of ours in flight in
+        # between — a broadcast was dropped or the node was reset. Trust the chain.
+        if (_next_nonce is not None and chain_nonce < _next_nonce
+                and not any(chain_nonce <= n < _next_nonce for n in _live_nonces)):
+            logger.warning(f"Nonce counter {_next_nonce} ahead of chain {chain_nonce} — resyncing")
+            _next_nonce = chain_nonce
+            _released_nonces.clear()
+
+        # Refill gaps left by calls whose tx was definitively rejected
+        reusable = sorted(n for n in _released_nonces if n >= chain_nonce and n not in _live_nonces)
+        _released_nonces.clear()
+        if reusable:
+            _released_nonces.update(reusable[1:])
+            nonce = reusable[0]
+        else:
+            nonce = chain_nonce if _next_nonce is None else max(chain_nonce, _next_nonce)
+            _next_nonce = nonce + 1
+        _live_nonces.add(nonce)
+        return nonce
+
+
+def _release_nonce(nonce: int):
+    _released_nonces.add(nonce)
+
+
+async def _wait_for_any_receipt(w3: Web3, tx_hashes: list, timeout: float):
+    """
+    Poll every hash broadcast for this nonce — the original or any fee-bumped
+    replacement may be the one that gets mined.
+    """
+    deadline = time.monotonic() + timeout
+    while True:
+        for tx_hash in tx_hashes:
+            try:
+                receipt = await asyncio.to_thread(w3.eth.get_transaction_receipt, tx_hash)
+            except TransactionNotFound:
+                continue
+            if receipt is not None:
+                return receipt
+        if time.monotonic() >= deadline:
+            raise TxTimeout(f"No receipt for {[h.hex() for h in tx_hashes]} after {timeout}s")
+        await asyncio.sleep(RECEIPT_POLL_SECONDS)
+
+
+def _backoff(attempt: int) -> float:
+    """Full-jitter exponential backoff."""
+    return random.uniform(0, min(BACKOFF_CAP_SECONDS, BACKOFF_BASE_SECONDS * 2 ** attempt))
+
+
+async def send_tx(contract_fn, *args, max_retries: int = 3, value: int = 0):
     """
-    Synchronous: build, sign, send, and wait for a contract function call.
+    Build, sign, send, and wait for a contract function call.
     Returns the tx receipt on success, raises on failure.
-    Called via asyncio.to_thread() so it doesn't block the event loop.
+
+    Blocking web3 calls run in threads and retries sleep on the event loop,
+    so nothing here blocks FastAPI. One nonce is used for the whole call:
+      - revert          → raise immediately (retrying wastes gas)
+      - timeout         → keep watching the original hash, fee-bump on same nonce
+      - underpriced     → fee-bump on same nonce
+      - already known   → keep watching what was broadcast
+      - nonce too low   → check our own hashes first, only then take a new nonce
+      - anything else   → resend the identical signed tx (idempotent)
     """
     w3, account, _, _ = get_chain()
+    gas_price = int(await asyncio.to_thread(lambda: w3.eth.gas_price) * GAS_PRICE_MULTIPLIER)
+    nonce = await _allocate_nonce(w3, account.address)
+    held = [nonce]  # every nonce this call allocated (a new one after "nonce too low")
+    try:
+        return await _send_with_nonce(w3, account, contract_fn, args, value, gas_price, held, max_retries)
+    finally:
+        # Whatever happened, this call no longer holds its nonces
+        _live_nonces.difference_update(held)
+
+
+async def _send_with_nonce(w3, account, contract_fn, args, value, gas_price, held, max_retries):
+    nonce = held[-1]
+    tx_hashes: list = []
+    # True once the node may hold a tx at this nonce. An RPC error or timeout
+    # during send does not prove the node rejected it, so only a classified
+    # rejection leaves this False.
+    maybe_broadcast = False
 
     for attempt in range(1, max_retries + 1):
         try:
-            nonce = w3.eth.get_transaction_count(account.address, "pending")
-            gas_price = w3.eth.gas_price
-
             tx = contract_fn(*args).build_transaction({
                 "from": account.address,
                 "nonce": nonce,
                 "gas": 500_000,
-                "gasPrice": int(gas_price * 1.2),  # slight overpay for reliability
+                "gasPrice": gas_price,
                 "chainId": CHAIN_ID,
+                "value": value,
             })
-
             signed = account.sign_transaction(tx)
-            tx_hash = w3.eth.send_raw_transaction(signed.raw_transaction)
-            receipt = w3.eth.wait_for_transaction_receipt(tx_hash, timeout=60)
-
+            if signed.hash not in tx_hashes:
+                tx_hashes.append(signed.hash)
+            try:
+                await asyncio.to_thread(w3.eth.send_raw_transaction, signed.raw_transaction)
+            except Exception as e:
+                send_kind = classify_tx_error(e)
+                # Our own earlier broadcast of this exact tx — just keep watching
+                if send_kind != TX_ALREADY_KNOWN:
+                    if send_kind in (TX_UNKNOWN, TX_TIMEOUT):
+                        maybe_broadcast = True
+                    raise
+            maybe_broadcast = True
+
+            receipt = await _wait_for_any_receipt(w3, tx_hashes, RECEIPT_TIMEOUT_SECONDS)
             if receipt.status != 1:
-                raise RuntimeError(f"Tx reverted: {tx_hash.hex()}")
+                raise TxReverted(f"Tx reverted: {receipt.transactionHash.hex()}")
 
-            logger.info(f"Tx confirmed: {tx_hash.hex()} (gas={receipt.gasUsed})")
+            logger.info(f"Tx confirmed: {receipt.transactionHash.hex()} (gas={receipt.gasUsed}, nonce={nonce})")
             return receipt
 
         except Exception as e:
-            logger.warning(f"send_tx attempt {attempt}/{max_retries} failed: {e}")
-            if attempt == max_retries:
+            kind = classify_tx_error(e)
+            logger.warning(f"send_tx attempt {attempt}/{max_retries} failed ({kind}): {e}")
+            if kind == TX_REVERTED or attempt == max_retries:
+                if not maybe_broadcast:
+                    _release_nonce(nonce)
                 raise
-            time.sleep(2 ** attempt)  # blocking sleep is fine — we're in a thread
-
 
-async def send_tx(contract_fn, *args, max_retries: int = 3):
-    """
-    Async-safe wrapper: runs the blocking web3 transaction in a thread
-    so it never blocks the FastAPI event loop.
-    """
-    return await asyncio.to_thread(_send_tx_sync, contract_fn, *args, max_retries=max_retries)
+            if kind in (TX_TIMEOUT, TX_UNDERPRICED):
+                gas_price = int(gas_price * FEE_BUMP_MULTIPLIER)
+            elif kind == TX_NONCE_TOO_LOW:
+                # The nonce was consumed — by one of our broadcasts, or by something else
+                if tx_hashes:
+                    try:
+                        receipt = await _wait_for_any_receipt(w3, tx_hashes, 0)
+                        if receipt.status != 1:
+                            raise TxReverted(f"Tx reverted: {receipt.transactionHash.hex()}")
+                        return receipt
+                    except TxTimeout:
+                        pass
+                _live_nonces.discard(nonce)
+                nonce = await _allocate_nonce(w3, account.address)
+                held.append(nonce)
+                tx_hashes, maybe_broadcast = [], False
+
+            await asyncio.sleep(_backoff(attempt))
 
 
 def get_request_status(request_id: int) -> dict:
@@ -246,11 +398,18 @@ def get_request_status(request_id: int) -> dict:
 # Shared in-memory on-chain event log (for the activity feed)
 # ---------------------------------------------------------------------------
 ON_CHAIN_EVENTS: list = []
+_on_chain_events_version = 0
+
+
+def on_chain_events_version() -> int:
+    """Bumped on every logged event — used as the /on-chain-events ETag."""
+    return _on_chain_events_version
 
 
 def log_chain_event(event_type: str, request_id: int, tx_hash: str):
     """Log an on-chain event for the activity feed."""
     from datetime import datetime
+    global _on_chain_events_version
 
     ON_CHAIN_EVENTS.append({
         "type": event_type,
@@ -261,3 +420,4 @@ def log_chain_event(event_type: str, request_id: int, tx_hash: str):
     # Keep last 50
     if len(ON_CHAIN_EVENTS) > 50:
         ON_CHAIN_EVENTS.pop(0)
+    _on_chain_events_version += 1
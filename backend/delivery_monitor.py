@@ -1,48 +1,261 @@
 """
-delivery_monitor.py — Simulated delivery confirmation.
+delivery_monitor.py — Simulated delivery fleet + delivery confirmation.
 
-After MissionControl.approveAid() succeeds (status = APPROVED), this module
-waits a configurable delay (simulating drone/vehicle travel), then calls
-confirmDelivery() which triggers the Treasury payout internally in Solidity.
+After MissionControl.approveAid() succeeds (status = APPROVED), the request is
+handed to a single DeliveryScheduler. It assigns the nearest free unit of the
+chosen provider type (drone / ground vehicle / human team), computes the ETA
+from distance and unit speed, and keeps every in-flight leg in a timer heap.
+One background task sleeps until the earliest event: on arrival it calls
+confirmDelivery(), which triggers the Treasury payout internally in Solidity,
+and the unit flies back to base before its slot is free again.
 
 NOTE: MissionControl.confirmDelivery() already calls treasury.processPayout()
 on-chain. We do NOT call processPayout separately — that would revert.
 """
 
+import time
+import heapq
 import asyncio
 import logging
+from collections import deque
+
+from geopy.distance import geodesic
 
 from chain import is_chain_configured
 from fdc_client import confirm_delivery
 
 logger = logging.getLogger("aegis.delivery")
 
-# Simulated delivery time in seconds (45-60s for demo realism)
-DELIVERY_DELAY_SECONDS = 30
+# Timer heap event kinds
+EVENT_ARRIVE = "arrive"
+EVENT_RETURN = "return"
+
+# Simulated time runs this many times faster than real time (demo realism)
+SIMULATION_SPEEDUP = 60
+# Clamp simulated deliveries so far-away disasters still finish within a demo
+MIN_DELIVERY_SECONDS = 10
+MAX_DELIVERY_SECONDS = 120
+# Finished (CONFIRMED/FAILED) records stay queryable this long, then are evicted
+DELIVERY_RETENTION_SECONDS = 600
+
+# Unit templates: speed in km/h, capacity = concurrent deliveries per unit
+PROVIDER_PROFILES = {
+    "Drone": {"speed_kmh": 80, "capacity": 1},
+    "Ground Vehicle": {"speed_kmh": 50, "capacity": 4},
+    "Human Team": {"speed_kmh": 5, "capacity": 2},
+}
+
+# Demo fleet: (unit id, provider type, base lat, base lng)
+FLEET = [
+    ("AEG-01", "Drone", 51.7520, -1.2577),
+    ("AEG-02", "Drone", 51.7520, -1.2577),
+    ("AEG-03", "Drone", 39.4699, -0.3763),
+    ("AEG-04", "Drone", 34.0522, -118.2437),
+    ("GV-01", "Ground Vehicle", 51.7520, -1.2577),
+    ("GV-02", "Ground Vehicle", 39.4699, -0.3763),
+    ("GV-03", "Ground Vehicle", 34.0522, -118.2437),
+    ("HT-01", "Human Team", 51.7520, -1.2577),
+    ("HT-02", "Human Team", 34.0522, -118.2437),
+]
 
 
-async def schedule_delivery(request_id: int) -> str | None:
+class DeliveryScheduler:
     """
-    Background task: wait for simulated delivery, then confirm on-chain.
+    Timer-heap scheduler for the simulated fleet.
+
+    Units always depart from their base. A delivery holds one of its unit's
+    capacity slots for the outbound leg and the return leg. Deliveries that
+    cannot be assigned (every matching unit is full) wait in a per-provider
+    FIFO queue and are dispatched as soon as a unit is back.
+    """
+
+    def __init__(self, fleet: list = FLEET):
+        self.units = {
+            unit_id: {
+                "id": unit_id,
+                "provider_type": provider_type,
+                "lat": lat,
+                "lng": lng,
+                "active": 0,
+                **PROVIDER_PROFILES[provider_type],
+            }
+            for unit_id, provider_type, lat, lng in fleet
+        }
+        self.deliveries: dict = {}
+        self.heap: list = []
+        self.waiting = {provider_type: deque() for provider_type in PROVIDER_PROFILES}
+        self.finished: deque = deque()
+        # The event loop only keeps weak references to tasks — hold them until done
+        self._confirms: set = set()
+        self._wakeup = asyncio.Event()
+        self._task: asyncio.Task | None = None
+
+    # -- dispatch -----------------------------------------------------------
+    def _nearest_free_unit(self, lat: float, lng: float, provider_type: str) -> tuple:
+        best, best_km = None, float("inf")
+        for unit in self.units.values():
+            if unit["provider_type"] != provider_type or unit["active"] >= unit["capacity"]:
+                continue
+            km = geodesic((unit["lat"], unit["lng"]), (lat, lng)).km
+            if km < best_km:
+                best, best_km = unit, km
+        return best, best_km
+
+    def _dispatch(self, delivery: dict) -> bool:
+        unit, km = self._nearest_free_unit(delivery["lat"], delivery["lng"], delivery["provider_type"])
+        if unit is None:
+            return False
+
+        travel = km / unit["speed_kmh"] * 3600 / SIMULATION_SPEEDUP
+        leg = min(max(travel, MIN_DELIVERY_SECONDS), MAX_DELIVERY_SECONDS)
+        now = time.time()
+        unit["active"] += 1
+        delivery.update({
+            "status": "EN_ROUTE",
+            "unit_id": unit["id"],
+            "origin": (unit["lat"], unit["lng"]),
+            "distance_km": round(km, 2),
+            "dispatched_at": now,
+            "eta": now + leg,
+            "returns_at": now + 2 * leg,
+        })
+        heapq.heappush(self.heap, (delivery["eta"], EVENT_ARRIVE, delivery["request_id"]))
+        self._wakeup.set()
+        logger.info(f"Delivery #{delivery['request_id']}: {unit['id']} dispatched, {km:.1f}km, "
+                    f"ETA {delivery['eta'] - now:.0f}s")
+        return True
+
+    def schedule(self, request_id: int, lat: float, lng: float, provider_type: str) -> dict:
+        if provider_type not in PROVIDER_PROFILES:
+            provider_type = "Drone"
+        delivery = {"request_id": request_id, "lat": lat, "lng": lng,
+                    "provider_type": provider_type, "status": "QUEUED"}
+        self.deliveries[request_id] = delivery
+        if not self._dispatch(delivery):
+            self.waiting[provider_type].append(delivery)
+            logger.info(f"Delivery #{request_id}: no free {provider_type} — queued "
+                        f"({len(self.waiting[provider_type])} waiting)")
+
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+        return delivery
+
+    # -- completion ---------------------------------------------------------
+    def _arrive(self, delivery: dict):
+        delivery["status"] = "DELIVERED"
+        # The slot stays taken until the unit is back at base
+        heapq.heappush(self.heap, (delivery["returns_at"], EVENT_RETURN, delivery["request_id"]))
+
+    def _return(self, delivery: dict):
+        unit = self.units[delivery["unit_id"]]
+        unit["active"] -= 1
+
+        # One slot just freed up — hand it to the oldest waiting request of that type
+        queue = self.waiting[unit["provider_type"]]
+        if queue:
+            self._dispatch(queue.popleft())
+
+    async def _confirm(self, delivery: dict):
+        request_id = delivery["request_id"]
+        try:
+            tx_hash = await confirm_delivery(request_id)
+        except Exception as e:
+            logger.error(f"Delivery #{request_id}: confirmDelivery raised {e}")
+            tx_hash = None
+        delivery["finished_at"] = time.time()
+        self.finished.append(request_id)
+        if not tx_hash:
+            delivery["status"] = "FAILED"
+            logger.error(f"Delivery #{request_id}: confirmDelivery failed")
+            return
+        delivery.update({"status": "CONFIRMED", "tx_hash": tx_hash})
+        logger.info(f"Delivery #{request_id}: confirmed and paid — tx {tx_hash}")
 
-    1. Wait DELIVERY_DELAY_SECONDS (simulating drone flight)
-    2. Call MissionControl.confirmDelivery() via fdc_client
+    def _prune(self, now: float):
+        """Evict finished records past retention (never before the unit is back)."""
+        while self.finished:
+            delivery = self.deliveries[self.finished[0]]
+            if now - delivery["finished_at"] < DELIVERY_RETENTION_SECONDS or delivery["returns_at"] > now:
+                break
+            self.finished.popleft()
+            del self.deliveries[delivery["request_id"]]
+
+    async def _run(self):
+        """The single scheduler task: sleep until the earliest ETA, then fire."""
+        while True:
+            self._wakeup.clear()
+            now = time.time()
+            while self.heap and self.heap[0][0] <= now:
+                _, event, request_id = heapq.heappop(self.heap)
+                delivery = self.deliveries[request_id]
+                if event == EVENT_ARRIVE:
+                    self._arrive(delivery)
+                    task = asyncio.create_task(self._confirm(delivery))
+                    self._confirms.add(task)
+                    task.add_done_callback(self._confirms.discard)
+                else:
+                    self._return(delivery)
+            self._prune(now)
+
+            timeout = self.heap[0][0] - now if self.heap else None
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    # -- live view ----------------------------------------------------------
+    def position(self, delivery: dict) -> dict | None:
+        """Interpolated unit position for an in-flight delivery."""
+        if delivery["status"] != "EN_ROUTE":
+            return None
+        span = delivery["eta"] - delivery["dispatched_at"]
+        progress = min(max((time.time() - delivery["dispatched_at"]) / span, 0.0), 1.0) if span > 0 else 1.0
+        o_lat, o_lng = delivery["origin"]
+        return {
+            "lat": o_lat + (delivery["lat"] - o_lat) * progress,
+            "lng": o_lng + (delivery["lng"] - o_lng) * progress,
+            "progress": round(progress, 3),
+        }
+
+    def status(self, request_id: int) -> dict | None:
+        delivery = self.deliveries.get(request_id)
+        if delivery is None:
+            return None
+        eta = delivery.get("eta")
+        return {
+            "request_id": request_id,
+            "status": delivery["status"],
+            "provider_type": delivery["provider_type"],
+            "unit_id": delivery.get("unit_id"),
+            "distance_km": delivery.get("distance_km"),
+            "eta_seconds": max(round(eta - time.time()), 0) if eta else None,
+            "position": self.position(delivery),
+            "destination": {"lat": delivery["lat"], "lng": delivery["lng"]},
+            "tx_hash": delivery.get("tx_hash"),
+        }
+
+    def fleet(self) -> list:
+        return [
+            {k: unit[k] for k in ("id", "provider_type", "lat", "lng", "active", "capacity")}
+            for unit in self.units.values()
+        ]
+
+
+SCHEDULER = DeliveryScheduler()
+
+
+def schedule_delivery(request_id: int, lat: float, lng: float, provider_type: str) -> dict | None:
+    """
+    Hand an approved request to the fleet scheduler.
+
+    1. Assign the nearest free unit of `provider_type` (or queue if all busy)
+    2. When the ETA expires, call MissionControl.confirmDelivery() via fdc_client
        → Solidity internally calls AidTreasury.processPayout()
+    3. The unit flies back to base before it can take the next job
 
-    Returns the confirmDelivery tx hash on success, None on failure.
+    Returns the delivery record, or None if the chain is not configured.
     """
     if not is_chain_configured():
         logger.warning("Chain not configured — skipping delivery")
         return None
-
-    logger.info(f"Delivery #{request_id}: waiting {DELIVERY_DELAY_SECONDS}s for simulated delivery...")
-    await asyncio.sleep(DELIVERY_DELAY_SECONDS)
-
-    # Confirm delivery on-chain (this triggers payout automatically in the contract)
-    tx_hash = await confirm_delivery(request_id)
-    if not tx_hash:
-        logger.error(f"Delivery #{request_id}: confirmDelivery failed")
-        return None
-
-    logger.info(f"Delivery #{request_id}: confirmed and paid — tx {tx_hash}")
-    return tx_hash
+    return SCHEDULER.schedule(request_id, lat, lng, provider_type)
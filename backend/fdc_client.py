@@ -1,47 +1,349 @@
 """
 fdc_client.py — FDC (Flare Data Connector) verification for disaster events.
 
-Currently uses a mock Merkle proof for the demo. See TODO comments for
-the real FDC attestation flow.
+Proofs are obtained through a batching AttestationClient:
+
+1. Every verification that arrives within BATCH_WINDOW_SECONDS is collected
+   into one batch.
+2. Each request in the batch is encoded (Web2Json via the FDC verifier) and
+   submitted to FdcHub, so they all land in the current voting round.
+3. Finalization of each round is polled once (Relay.isFinalized), shared by
+   every request waiting on that round.
+4. Merkle proofs are fetched from the DA layer, cached by
+   (request_id, purpose), and fanned back out to the waiting pipelines.
+
+Demo mode: without FDC_HUB_ADDRESS / FDC_RELAY_ADDRESS (or without
+FDC_DA_LAYER_URL) nothing is attested — _demo_proofs() builds a Merkle tree
+over the batch locally, which only MockFdcVerification accepts.
+
+Delivery confirmation is always a demo proof: deliveries are simulated by
+delivery_monitor, so there is no external source for FDC to attest.
 """
 
+import os
+import time
+import asyncio
 import logging
+
+import httpx
 from web3 import Web3
 
 from chain import get_chain, send_tx, is_chain_configured, log_chain_event
 
 logger = logging.getLogger("aegis.fdc")
 
+# Flare system protocol id for FDC and the voting epoch layout (Coston2)
+FDC_PROTOCOL_ID = 200
+FIRST_VOTING_ROUND_START_TS = 1658430000
+VOTING_EPOCH_DURATION_SECONDS = 90
 
-def _mock_merkle_proof(request_id: int, purpose: str, lat: float = 0, lng: float = 0) -> tuple:
-    """
-    Generate a deterministic mock Merkle proof.
-    In real FDC, this would come from the FdcVerification relay contract.
-    
-    Returns: (proof: list[bytes32], root: bytes32, leaf: bytes32)
-    """
-    # TODO: Replace mock with real FDC attestation
-    # 1. Encode a Web2Json attestation request:
-    #    "Verify that https://earthquake.usgs.gov/... returns magnitude >= 2.5 within 100km of (lat, lng)"
-    # 2. Submit attestation request to FdcHub contract on Coston2
-    # 3. Wait for the attestation round to finalize (~90 seconds)
-    # 4. Retrieve the Merkle proof from the FdcVerification relay contract
-    # 5. Pass the real proof/root/leaf to verifyEvent()
-
-    leaf = Web3.solidity_keccak(
+# Requests arriving within this window share one submission batch
+BATCH_WINDOW_SECONDS = 3
+ROUND_POLL_SECONDS = 10
+# A round normally finalizes within ~1.5 epochs of its end; give up after a few
+ROUND_FINALIZATION_TIMEOUT_SECONDS = 4 * VOTING_EPOCH_DURATION_SECONDS
+MAX_CACHED_PROOFS = 1000
+
+# Proof purposes backed by a real Web2Json attestation (others are demo proofs)
+FDC_ATTESTED_PURPOSES = {"disaster_verified"}
+
+USGS_FEED_URL = "https://earthquake.usgs.gov/earthquakes/feed/v1.0/summary/2.5_day.geojson"
+
+FDC_HUB_ABI = [
+    {
+        "inputs": [{"name": "_data", "type": "bytes"}],
+        "name": "requestAttestation",
+        "outputs": [],
+        "stateMutability": "payable",
+        "type": "function",
+    },
+]
+
+RELAY_ABI = [
+    {
+        "inputs": [{"name": "_protocolId", "type": "uint256"}, {"name": "_votingRoundId", "type": "uint256"}],
+        "name": "isFinalized",
+        "outputs": [{"name": "", "type": "bool"}],
+        "stateMutability": "view",
+        "type": "function",
+    },
+    {
+        "inputs": [{"name": "", "type": "uint256"}, {"name": "", "type": "uint256"}],
+        "name": "merkleRoots",
+        "outputs": [{"name": "", "type": "bytes32"}],
+        "stateMutability": "view",
+        "type": "function",
+    },
+]
+
+
+def is_fdc_configured() -> bool:
+    """Real FdcHub submission is available (otherwise proofs are built locally)."""
+    return bool(os.getenv("FDC_HUB_ADDRESS") and os.getenv("FDC_RELAY_ADDRESS"))
+
+
+def _leaf(request_id: int, purpose: str, lat: float = 0, lng: float = 0) -> bytes:
+    return bytes(Web3.solidity_keccak(
         ["uint256", "string", "string"],
         [request_id, purpose, f"{lat},{lng}"]
-    )
-    # Single-element proof where root == leaf (mock accepts this)
-    root = leaf
-    proof = []  # empty proof — root == leaf, MockFdcVerification returns true
-    return proof, root, leaf
+    ))
+
+
+def _hash_pair(a: bytes, b: bytes) -> bytes:
+    # Sorted-pair hashing, as used by FDC Merkle trees (OpenZeppelin MerkleProof)
+    return bytes(Web3.keccak(a + b if a < b else b + a))
+
+
+def _merkle_tree(leaves: list) -> tuple:
+    """
+    Build a Merkle tree over `leaves`.
+
+    Returns: (root: bytes32, proofs: list[list[bytes32]]) — proofs[i] proves leaves[i].
+    A single leaf gives root == leaf and an empty proof.
+    """
+    proofs = [[] for _ in leaves]
+    positions = list(range(len(leaves)))  # leaf index → node index in current level
+    level = list(leaves)
+    while len(level) > 1:
+        next_level = []
+        for i in range(0, len(level), 2):
+            if i + 1 < len(level):
+                next_level.append(_hash_pair(level[i], level[i + 1]))
+            else:
+                next_level.append(level[i])  # odd node is promoted unchanged
+        for leaf_idx, node_idx in enumerate(positions):
+            sibling = node_idx ^ 1
+            if sibling < len(level):
+                proofs[leaf_idx].append(level[sibling])
+            positions[leaf_idx] = node_idx // 2
+        level = next_level
+    return level[0], proofs
+
+
+def _web2json_request_body(lat: float, lng: float) -> dict:
+    """Web2Json attestation: USGS feed has an event (M >= 2.5) within 100km of (lat, lng)."""
+    return {
+        "url": USGS_FEED_URL,
+        "httpMethod": "GET",
+        "headers": "{}",
+        "queryParams": "{}",
+        "body": "{}",
+        "postProcessJq": (
+            f"{{nearby: ([.features[] | select(.properties.mag >= 2.5) "
+            f"| select(((.geometry.coordinates[1] - {lat}) | fabs) < 1 "
+            f"and ((.geometry.coordinates[0] - {lng}) | fabs) < 1)] | length)}}"
+        ),
+        "abiSignature": '{"components":[{"internalType":"uint256","name":"nearby","type":"uint256"}],'
+                        '"name":"task","type":"tuple"}',
+    }
+
+
+class AttestationClient:
+    """
+    Batches pending verifications into FDC voting rounds and caches proofs.
+
+    `get_proof()` is the only entry point; concurrent callers asking for the
+    same (request_id, purpose) share one in-flight attestation.
+    """
+
+    def __init__(self):
+        self.proofs: dict = {}
+        self.inflight: dict = {}
+        self.pending: list = []
+        self.rounds: dict = {}
+        self._collector: asyncio.Task | None = None
+
+    async def get_proof(self, request_id: int, purpose: str, lat: float = 0, lng: float = 0) -> tuple:
+        """Returns: (proof: list[bytes32], root: bytes32, leaf: bytes32)"""
+        key = (request_id, purpose)
+        if key in self.proofs:
+            return self.proofs[key]
+
+        future = self.inflight.get(key)
+        if future is None:
+            future = asyncio.get_running_loop().create_future()
+            self.inflight[key] = future
+            self.pending.append((key, lat, lng))
+            if self._collector is None or self._collector.done():
+                self._collector = asyncio.create_task(self._collect())
+        # Shield so one cancelled waiter does not cancel the shared attestation
+        return await asyncio.shield(future)
+
+    async def _collect(self):
+        while self.pending:
+            await asyncio.sleep(BATCH_WINDOW_SECONDS)
+            batch, self.pending = self.pending, []
+            asyncio.create_task(self._process(batch))
+
+    async def _process(self, batch: list):
+        logger.info(f"FDC batch of {len(batch)} attestation(s)")
+        try:
+            results = await self._attest(batch)
+        except Exception as e:
+            logger.error(f"FDC batch failed: {e}")
+            results = {key: e for key, _, _ in batch}
+        for key, _, _ in batch:
+            future = self.inflight.pop(key)
+            result = results.get(key) or RuntimeError(f"No FDC proof for request #{key[0]} ({key[1]})")
+            if isinstance(result, BaseException):
+                logger.error(f"FDC attestation for request #{key[0]} ({key[1]}) failed: {result}")
+                future.set_exception(result)
+            else:
+                self._cache(key, result)
+                future.set_result(result)
+
+    def _cache(self, key: tuple, proof: tuple):
+        if len(self.proofs) >= MAX_CACHED_PROOFS:
+            self.proofs.pop(next(iter(self.proofs)))
+        self.proofs[key] = proof
+
+    # -- attestation flow ---------------------------------------------------
+    async def _attest(self, batch: list) -> dict:
+        """
+        Returns {key: (proof, root, leaf)} — or, for a request that failed,
+        {key: exception}, so one failure never fails the rest of the batch.
+        """
+        if not is_fdc_configured():
+            return self._demo_proofs(batch)
+
+        demo = [item for item in batch if item[0][1] not in FDC_ATTESTED_PURPOSES]
+        batch = [item for item in batch if item[0][1] in FDC_ATTESTED_PURPOSES]
+        results = self._demo_proofs(demo) if demo else {}
+        request_bytes = await asyncio.gather(
+            *(self._prepare_request(key, lat, lng) for key, lat, lng in batch), return_exceptions=True
+        )
+
+        # Submit sequentially (one oracle nonce), grouping requests by voting round
+        by_round: dict = {}
+        hub = self._contract("FDC_HUB_ADDRESS", FDC_HUB_ABI)
+        fee = int(os.getenv("FDC_REQUEST_FEE_WEI", "0"))
+        for (key, lat, lng), data in zip(batch, request_bytes):
+            if isinstance(data, BaseException):
+                results[key] = data
+                continue
+            try:
+                receipt = await send_tx(hub.functions.requestAttestation, data, value=fee)
+                round_id = await self._round_of(receipt.blockNumber)
+            except Exception as e:
+                results[key] = e
+                continue
+            by_round.setdefault(round_id, []).append((key, lat, lng, data))
+
+        rounds = await asyncio.gather(
+            *(self._finalized_proofs(round_id, items) for round_id, items in by_round.items()),
+            return_exceptions=True,
+        )
+        for items, proofs in zip(by_round.values(), rounds):
+            if isinstance(proofs, BaseException):
+                results.update({key: proofs for key, *_ in items})
+            else:
+                results.update(proofs)
+        return results
+
+    async def _finalized_proofs(self, round_id: int, items: list) -> dict:
+        await self._wait_finalized(round_id)
+        return await self._round_proofs(round_id, items)
+
+    def _contract(self, env_var: str, abi: list):
+        w3, _, _, _ = get_chain()
+        return w3.eth.contract(address=Web3.to_checksum_address(os.getenv(env_var)), abi=abi)
+
+    async def _prepare_request(self, key: tuple, lat: float, lng: float) -> bytes:
+        verifier_url = os.getenv("FDC_VERIFIER_URL")
+        if not verifier_url:
+            # No verifier (e.g. MockFdcHub): submit the leaf as opaque request data
+            return _leaf(*key, lat, lng)
+
+        payload = {
+            "attestationType": "0x" + b"Web2Json".hex().ljust(64, "0"),
+            "sourceId": "0x" + b"PublicWeb2".hex().ljust(64, "0"),
+            "requestBody": _web2json_request_body(lat, lng),
+        }
+        async with httpx.AsyncClient(timeout=30.0) as client:
+            res = await client.post(
+                f"{verifier_url}/verifier/web2/Web2Json/prepareRequest",
+                json=payload,
+                headers={"X-API-KEY": os.getenv("FDC_VERIFIER_API_KEY", "")},
+            )
+            res.raise_for_status()
+            data = res.json()
+        if data.get("status") != "VALID":
+            raise RuntimeError(f"Verifier rejected request: {data.get('status')}")
+        return bytes.fromhex(data["abiEncodedRequest"].removeprefix("0x"))
+
+    async def _round_of(self, block_number: int) -> int:
+        w3, _, _, _ = get_chain()
+        block = await asyncio.to_thread(w3.eth.get_block, block_number)
+        return (block.timestamp - FIRST_VOTING_ROUND_START_TS) // VOTING_EPOCH_DURATION_SECONDS
+
+    async def _wait_finalized(self, round_id: int):
+        """Poll finalization once per round, shared by every batch in it."""
+        task = self.rounds.get(round_id)
+        if task is None:
+            task = asyncio.create_task(self._poll_round(round_id))
+            self.rounds[round_id] = task
+            task.add_done_callback(lambda _: self.rounds.pop(round_id, None))
+        await asyncio.shield(task)
+
+    async def _poll_round(self, round_id: int):
+        relay = self._contract("FDC_RELAY_ADDRESS", RELAY_ABI)
+        deadline = time.monotonic() + ROUND_FINALIZATION_TIMEOUT_SECONDS
+        while not await asyncio.to_thread(relay.functions.isFinalized(FDC_PROTOCOL_ID, round_id).call):
+            if time.monotonic() >= deadline:
+                raise TimeoutError(f"FDC round {round_id} not finalized after {ROUND_FINALIZATION_TIMEOUT_SECONDS}s")
+            await asyncio.sleep(ROUND_POLL_SECONDS)
+        logger.info(f"FDC round {round_id} finalized")
+
+    async def _round_proofs(self, round_id: int, items: list) -> dict:
+        da_url = os.getenv("FDC_DA_LAYER_URL")
+        if not da_url:
+            return self._demo_proofs([(key, lat, lng) for key, lat, lng, _ in items])
+
+        relay = self._contract("FDC_RELAY_ADDRESS", RELAY_ABI)
+        root = bytes(await asyncio.to_thread(relay.functions.merkleRoots(FDC_PROTOCOL_ID, round_id).call))
+
+        async with httpx.AsyncClient(timeout=30.0) as client:
+            async def fetch(data: bytes) -> dict:
+                res = await client.post(
+                    f"{da_url}/api/v1/fdc/proof-by-request-round-raw",
+                    json={"votingRoundId": round_id, "requestBytes": "0x" + data.hex()},
+                    headers={"X-API-KEY": os.getenv("FDC_DA_LAYER_API_KEY", "")},
+                )
+                res.raise_for_status()
+                return res.json()
+
+            responses = await asyncio.gather(*(fetch(data) for _, _, _, data in items), return_exceptions=True)
+
+        results = {}
+        for (key, _, _, _), body in zip(items, responses):
+            if isinstance(body, BaseException):
+                results[key] = body
+                continue
+            try:
+                leaf = bytes(Web3.keccak(hexstr=body["response_hex"]))
+                proof = [bytes.fromhex(p.removeprefix("0x")) for p in body["proof"]]
+                results[key] = (proof, root, leaf)
+            except Exception as e:
+                results[key] = e
+        return results
+
+    def _demo_proofs(self, batch: list) -> dict:
+        """Demo mode only: one locally built Merkle tree over the whole batch."""
+        leaves = [_leaf(request_id, purpose, lat, lng) for (request_id, purpose), lat, lng in batch]
+        root, proofs = _merkle_tree(leaves)
+        return {
+            key: (proof, root, leaf)
+            for (key, _, _), proof, leaf in zip(batch, proofs, leaves)
+        }
+
+
+ATTESTATIONS = AttestationClient()
 
 
 async def verify_event(request_id: int, lat: float, lng: float) -> str | None:
     """
     Verify a disaster event via FDC proof and call MissionControl.verifyEvent().
-    
+
     Returns the tx hash on success, None on failure.
     """
     if not is_chain_configured():
@@ -50,7 +352,7 @@ async def verify_event(request_id: int, lat: float, lng: float) -> str | None:
 
     try:
         _, _, mission_control, _ = get_chain()
-        proof, root, leaf = _mock_merkle_proof(request_id, "disaster_verified", lat, lng)
+        proof, root, leaf = await ATTESTATIONS.get_proof(request_id, "disaster_verified", lat, lng)
 
         receipt = await send_tx(
             mission_control.functions.verifyEvent,
@@ -68,8 +370,9 @@ async def verify_event(request_id: int, lat: float, lng: float) -> str | None:
 
 async def confirm_delivery(request_id: int) -> str | None:
     """
-    Confirm delivery via FDC proof and call MissionControl.confirmDelivery().
-    
+    Confirm delivery and call MissionControl.confirmDelivery(). The proof is
+    always a demo proof, since the delivery itself is simulated.
+
     Returns the tx hash on success, None on failure.
     """
     if not is_chain_configured():
@@ -78,7 +381,7 @@ async def confirm_delivery(request_id: int) -> str | None:
 
     try:
         _, _, mission_control, _ = get_chain()
-        proof, root, leaf = _mock_merkle_proof(request_id, "delivery_confirmed")
+        proof, root, leaf = await ATTESTATIONS.get_proof(request_id, "delivery_confirmed")
 
         receipt = await send_tx(
             mission_control.functions.confirmDelivery,
@@ -0,0 +1,220 @@
+"""
+hazard_grid.py — Precomputed hazard grid for instant "am I in a zone?" checks.
+
+The world is cut into fixed lat/lng cells (HAZARD_CELL_DEG on a side). Each
+active disaster registers itself in every cell within REACH of its centre,
+storing the cell-centre distance. A point lookup is then a single dict hit on
+the cell key followed by one exact geodesic to the winning disaster (a few,
+only when two centres are too close to call within the cell). Each cell also
+carries a distance band (inside / boundary / outside the nearest radius) that
+the map uses as a precomputed overlay.
+
+The grid is updated incrementally when the USGS feed refreshes: only cells
+belonging to disasters that appeared, disappeared or moved are touched.
+"""
+
+import math
+import logging
+
+from geopy.distance import geodesic
+
+logger = logging.getLogger("aegis.hazard")
+
+# Cell edge in degrees (~11km at the equator)
+HAZARD_CELL_DEG = 0.1
+EARTH_RADIUS_KM = 6371.0088
+
+# Distance bands reported per cell (relative to the nearest disaster's radius)
+BAND_INSIDE = "inside"
+BAND_BOUNDARY = "boundary"
+BAND_OUTSIDE = "outside"
+
+
+def _haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """Great-circle distance — cheap approximation used for building cells."""
+    p1, p2 = math.radians(lat1), math.radians(lat2)
+    dp = p2 - p1
+    dl = math.radians(lon2 - lon1)
+    a = math.sin(dp / 2) ** 2 + math.cos(p1) * math.cos(p2) * math.sin(dl / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+_LNG_CELLS = round(360 / HAZARD_CELL_DEG)
+
+
+def _wrap_lng_index(j: int) -> int:
+    """Fold a longitude cell index back into [-180, 180) across the antimeridian."""
+    return (j + _LNG_CELLS // 2) % _LNG_CELLS - _LNG_CELLS // 2
+
+
+def _cell_key(lat: float, lng: float) -> tuple:
+    return (math.floor(lat / HAZARD_CELL_DEG), _wrap_lng_index(math.floor(lng / HAZARD_CELL_DEG)))
+
+
+def _cell_bounds(key: tuple) -> tuple:
+    """Returns (south, west, north, east) for a cell key."""
+    south, west = key[0] * HAZARD_CELL_DEG, key[1] * HAZARD_CELL_DEG
+    return south, west, south + HAZARD_CELL_DEG, west + HAZARD_CELL_DEG
+
+
+def _cell_geometry(key: tuple) -> tuple:
+    """Returns (center_lat, center_lng, half_diagonal_km) for a cell key."""
+    south, west, north, east = _cell_bounds(key)
+    c_lat, c_lng = (south + north) / 2, (west + east) / 2
+    # The corner nearest the equator is the furthest from the centre
+    corner_lat = south if abs(south) < abs(north) else north
+    return c_lat, c_lng, _haversine_km(c_lat, c_lng, corner_lat, east)
+
+
+class HazardGrid:
+    """
+    Sparse cell → {disaster_id: centre_distance_km} index over active disasters.
+
+    Every disaster is registered out to `reach_km` (the largest active radius
+    plus one cell), so any disaster whose centre lies within `reach_km` of a
+    point is guaranteed to be a candidate in that point's cell.
+    """
+
+    def __init__(self):
+        self.cells: dict = {}
+        self.disasters: dict = {}
+        self.footprints: dict = {}
+        self.reach_km = 0.0
+        self.version = 0
+        self._tiles: dict = {}
+        self._tiles_version = -1
+
+    # -- building -----------------------------------------------------------
+    def _add(self, d: dict):
+        lat, lng = d["lat"], d["lon"]
+        lat_span = self.reach_km / 111.0 + HAZARD_CELL_DEG
+        cos_lat = max(math.cos(math.radians(lat)), 0.01)
+        lng_span = min(self.reach_km / (111.0 * cos_lat) + HAZARD_CELL_DEG, 180.0)
+
+        lo_lat = math.floor(max(lat - lat_span, -90.0) / HAZARD_CELL_DEG)
+        hi_lat = math.floor(min(lat + lat_span, 90.0) / HAZARD_CELL_DEG)
+        lo_lng = math.floor((lng - lng_span) / HAZARD_CELL_DEG)
+        hi_lng = math.floor((lng + lng_span) / HAZARD_CELL_DEG)
+
+        footprint = set()
+        for i in range(lo_lat, hi_lat + 1):
+            for j in range(lo_lng, hi_lng + 1):
+                key = (i, _wrap_lng_index(j))
+                c_lat, c_lng, half_diag = _cell_geometry(key)
+                dist = _haversine_km(c_lat, c_lng, lat, lng)
+                if dist <= self.reach_km + half_diag:
+                    self.cells.setdefault(key, {})[d["id"]] = dist
+                    footprint.add(key)
+        self.footprints[d["id"]] = footprint
+
+    def _remove(self, disaster_id: str):
+        for key in self.footprints.pop(disaster_id, ()):
+            del self.cells[key][disaster_id]
+            if not self.cells[key]:
+                del self.cells[key]
+
+    def update(self, disasters: list):
+        """Sync the grid with the latest feed, touching only changed disasters."""
+        incoming = {d["id"]: d for d in disasters}
+        reach = max((d["radius"] for d in disasters), default=0) + HAZARD_CELL_DEG * 111.0
+
+        if reach > self.reach_km:
+            # Reach grew — every disaster must cover a wider ring, so rebuild
+            self.cells, self.disasters, self.footprints = {}, {}, {}
+            self.reach_km = reach
+
+        changed = 0
+        for disaster_id, old in list(self.disasters.items()):
+            new = incoming.get(disaster_id)
+            if new is None or (new["lat"], new["lon"], new["radius"]) != (old["lat"], old["lon"], old["radius"]):
+                self._remove(disaster_id)
+                del self.disasters[disaster_id]
+                changed += 1
+
+        for disaster_id, d in incoming.items():
+            if disaster_id not in self.disasters:
+                self._add(d)
+                self.disasters[disaster_id] = d
+                changed += 1
+            elif d != self.disasters[disaster_id]:
+                # Same geometry, revised details (e.g. magnitude in the name) — cells stay valid
+                self.disasters[disaster_id] = d
+                changed += 1
+
+        if changed:
+            self.version += 1
+            logger.info(f"Hazard grid updated — {changed} disasters changed, {len(self.cells)} cells")
+
+    # -- queries ------------------------------------------------------------
+    def _band(self, dist_km: float, half_diag: float, radius: float) -> str:
+        if dist_km + half_diag <= radius:
+            return BAND_INSIDE
+        if dist_km - half_diag <= radius:
+            return BAND_BOUNDARY
+        return BAND_OUTSIDE
+
+    def nearest(self, lat: float, lng: float) -> tuple | None:
+        """
+        Nearest disaster to a point as (disaster, exact_distance_km), or None
+        if the grid cannot answer authoritatively (caller should fall back to
+        a full scan).
+        """
+        key = _cell_key(lat, lng)
+        candidates = self.cells.get(key)
+        if not candidates:
+            return None
+
+        _, _, half_diag = _cell_geometry(key)
+        best = min(candidates.values())
+        # Only centres within one cell-width of the best can overtake it inside this cell
+        contenders = [i for i, dist in candidates.items() if dist - best <= 2 * half_diag]
+
+        closest, closest_dist = None, float("inf")
+        for disaster_id in contenders:
+            d = self.disasters[disaster_id]
+            dist = geodesic((lat, lng), (d["lat"], d["lon"])).km
+            if dist < closest_dist:
+                closest, closest_dist = d, dist
+
+        # Beyond reach, a disaster outside this cell's candidates could be closer
+        if closest_dist > self.reach_km:
+            return None
+        return closest, closest_dist
+
+    def _tile(self, key: tuple, disaster_id: str, dist_km: float) -> dict | None:
+        _, _, half_diag = _cell_geometry(key)
+        band = self._band(dist_km, half_diag, self.disasters[disaster_id]["radius"])
+        if band == BAND_OUTSIDE:
+            return None
+        south, west, north, east = _cell_bounds(key)
+        return {
+            "disaster_id": disaster_id,
+            "band": band,
+            "south": round(south, 6),
+            "west": round(west, 6),
+            "north": round(north, 6),
+            "east": round(east, 6),
+        }
+
+    def _build_tiles(self, disaster_id: str | None) -> list:
+        if disaster_id:
+            # One disaster's full zone, banded by its own distance — overlapping
+            # zones must not cut it where another disaster happens to be nearer
+            entries = ((key, disaster_id, self.cells[key][disaster_id])
+                       for key in self.footprints.get(disaster_id, ()))
+        else:
+            entries = ((key, *min(c.items(), key=lambda kv: kv[1])) for key, c in self.cells.items())
+        return [t for t in (self._tile(*entry) for entry in entries) if t]
+
+    def tiles(self, disaster_id: str | None = None) -> list:
+        """
+        Inside/boundary cells as map overlays. Unfiltered, each cell is labelled
+        with its nearest disaster; with `disaster_id`, that disaster's whole zone.
+        """
+        if self._tiles_version != self.version:
+            self._tiles, self._tiles_version = {}, self.version
+        if disaster_id not in self._tiles:
+            self._tiles[disaster_id] = self._build_tiles(disaster_id)
+        return self._tiles[disaster_id]
+
+HAZARD_GRID = HazardGrid()
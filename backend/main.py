@@ -11,8 +11,8 @@ from typing import TypedDict, Annotated, List, Optional
 # Ensure sibling modules are importable regardless of working directory
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
-from fastapi import FastAPI, HTTPException, Query
-from fastapi.responses import StreamingResponse
+from fastapi import FastAPI, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse, ORJSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 from geopy.distance import geodesic
@@ -20,10 +20,16 @@ from geopy.geocoders import Nominatim
 from langchain_groq import ChatGroq
 from langgraph.graph import StateGraph, END
 
-from chain import is_chain_configured, get_chain, send_tx, get_request_status, STATUS_MAP, log_chain_event, ON_CHAIN_EVENTS
+from chain import is_chain_configured, get_chain, send_tx, get_request_status, STATUS_MAP, log_chain_event, ON_CHAIN_EVENTS, on_chain_events_version
 from fdc_client import verify_event
-from approval_flow import run_approval
-from delivery_monitor import schedule_delivery
+from approval_flow import (
+    run_approval, decide_allocation, fallback_allocation, Allocation, JudgeDecision,
+    ALLOCATE_IN_JUDGE, MIN_COST_USD, MAX_COST_USD,
+)
+from delivery_monitor import schedule_delivery, SCHEDULER
+from hazard_grid import HAZARD_GRID, HAZARD_CELL_DEG
+from screening import SCREENER
+from responses import CompressionMiddleware, versioned_response, content_response
 
 logger = logging.getLogger("aegis.backend")
 
@@ -39,7 +45,7 @@ llm = ChatGroq(model="llama-3.3-70b-versatile", temperature=0.3, api_key=GROQ_AP
 # Initialize Geocoder
 geolocator = Nominatim(user_agent="aegis-disaster-relief")
 
-app = FastAPI()
+app = FastAPI(default_response_class=ORJSONResponse)
 
 app.add_middleware(
     CORSMiddleware,
@@ -47,9 +53,11 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(CompressionMiddleware, exclude_paths=("/evaluate-stream",))
 
 # --- GLOBAL STATE ---
 GLOBAL_DISASTERS = []
+DISASTERS_VERSION = 0
 
 # --- DATA MODELS ---
 class AidRequest(BaseModel):
@@ -66,6 +74,7 @@ class AgentState(TypedDict):
     user_request: str
     iteration: int
     verdict: str
+    allocation: Optional[Allocation]
 
 # Defined Agent Personas from Version 2
 AGENTS = [
@@ -86,6 +95,19 @@ def agent_node(state: AgentState, name: str, style: str):
     return {"messages": [f"{name}: {res.content}"], "iteration": state['iteration'] + 1}
 
 def judge_node(state: AgentState):
+    if ALLOCATE_IN_JUDGE:
+        prompt = (
+            f"Review this debate: {state['messages']}. Rules: VALID if majority support, DECLINED if majority doubt. "
+            f"Request: {state['user_request']}. If VALID, also allocate a provider (Drone / Ground Vehicle / Human Team) "
+            f"and a realistic cost in whole USD between {MIN_COST_USD} and {MAX_COST_USD}. "
+            'Respond in JSON: {"verdict": "VALID", "allocation": {"provider_type": "...", "cost_usd": 50}}'
+        )
+        try:
+            decision = llm.with_structured_output(JudgeDecision, method="json_mode").invoke(prompt)
+            return {"verdict": decision.verdict.value, "allocation": decision.allocation}
+        except Exception as e:
+            logger.warning(f"Structured judge failed ({e}) — falling back to plain verdict")
+
     prompt = (
         f"Review this debate: {state['messages']}. Rules: VALID if majority support, DECLINED if majority doubt. "
         "Respond with exactly one word: VALID or DECLINED."
@@ -107,16 +129,9 @@ workflow.add_edge(AGENTS[-1]["node"], "Judge")
 workflow.add_edge("Judge", END)
 graph = workflow.compile()
 
-# --- UTILITIES ---
-MONEY_KEYWORDS = ["money", "cash", "payment", "fund", "donate", "dollar", "euro", "pound", "£", "$", "€", "bitcoin", "crypto"]
-
-def contains_money_request(text: str) -> bool:
-    lower = text.lower()
-    return any(kw in lower for kw in MONEY_KEYWORDS)
-
 # --- BACKGROUND TASKS ---
 async def fetch_real_time_disasters():
-    global GLOBAL_DISASTERS
+    global GLOBAL_DISASTERS, DISASTERS_VERSION
     while True:
         new_events = []
         try:
@@ -141,7 +156,10 @@ async def fetch_real_time_disasters():
                 {"id": "d2", "name": "California Wildfire", "lat": 34.0522, "lon": -118.2437, "radius": 50},
                 {"id": "d3", "name": "Oxford Flash Flood", "lat": 51.7534, "lon": -1.2540, "radius": 100},
             ]
+        if new_events != GLOBAL_DISASTERS:
+            DISASTERS_VERSION += 1
         GLOBAL_DISASTERS = new_events
+        HAZARD_GRID.update(new_events)
         await asyncio.sleep(300)
 
 @app.on_event("startup")
@@ -150,8 +168,9 @@ async def startup():
 
 # --- ENDPOINTS ---
 @app.get("/disasters")
-async def get_disasters():
-    return GLOBAL_DISASTERS
+async def get_disasters(request: Request):
+    # 304 unless the feed changed since the client's last fetch
+    return versioned_response(request, f"disasters-{DISASTERS_VERSION}", lambda: GLOBAL_DISASTERS)
 
 @app.get("/nearby")
 async def check_nearby(lat: float = Query(...), lng: float = Query(...)):
@@ -169,10 +188,15 @@ async def check_nearby(lat: float = Query(...), lng: float = Query(...)):
         {"id": "d2", "name": "California Wildfire", "lat": 34.0522, "lon": -118.2437, "radius": 50},
     ]
 
-    for d in active_list:
-        dist = geodesic((lat, lng), (d["lat"], d["lon"])).km
-        if dist <= MAX_RANGE_KM and dist < closest_distance:
-            closest, closest_distance = d, dist
+    # Fast path: O(1) cell lookup in the precomputed hazard grid
+    hit = HAZARD_GRID.nearest(lat, lng) if GLOBAL_DISASTERS else None
+    if hit:
+        closest, closest_distance = hit
+    else:
+        for d in active_list:
+            dist = geodesic((lat, lng), (d["lat"], d["lon"])).km
+            if dist <= MAX_RANGE_KM and dist < closest_distance:
+                closest, closest_distance = d, dist
 
     location_name = "Unknown Location"
     try:
@@ -187,6 +211,15 @@ async def check_nearby(lat: float = Query(...), lng: float = Query(...)):
         return {"safe": False, "disaster": {**closest, "distance_km": round(closest_distance, 2)}, "distance_km": round(closest_distance, 2), "location_name": location_name}
     return {"safe": True, "location_name": location_name}
 
+@app.get("/hazard-tiles")
+async def get_hazard_tiles(request: Request, disaster_id: Optional[str] = Query(None)):
+    """Precomputed inside/boundary grid cells for drawing disaster overlays."""
+    return versioned_response(request, f"tiles-{HAZARD_GRID.version}-{disaster_id or 'all'}", lambda: {
+        "version": HAZARD_GRID.version,
+        "cell_deg": HAZARD_CELL_DEG,
+        "tiles": HAZARD_GRID.tiles(disaster_id),
+    })
+
 @app.post("/evaluate")
 async def evaluate_aid(req: AidRequest):
     if MODE == "DEMO" and req.disaster_id == "demo-001":
@@ -196,15 +229,30 @@ async def evaluate_aid(req: AidRequest):
         disaster = next((d for d in GLOBAL_DISASTERS if d["id"] == req.disaster_id), None) or {"name": "Manual Override", "lat": req.lat, "lon": req.lng, "radius": 50}
         distance = geodesic((req.lat, req.lng), (disaster["lat"], disaster["lon"])).km
 
-    if distance > disaster["radius"] and MODE != "DEMO":
-        return {"status": "DECLINED", "reason": f"Outside zone ({round(distance)}km away)."}
-
-    if contains_money_request(req.description):
-        return {"status": "PROCESSED", "final_verdict": "DECLINED", "debate": ["System: Financial requests are not permitted."]}
+    # Cheap local rules first — keep the six LLM calls for real cases
+    early = SCREENER.screen(
+        req.description, req.lat, req.lng,
+        distance_km=distance if MODE != "DEMO" else None,
+        radius_km=disaster["radius"],
+        check_duplicates=MODE != "DEMO",
+    )
+    if early and early["rule"] == "out_of_zone":
+        return {"status": "DECLINED", "reason": early["reason"]}
+    if early:
+        return {"status": "PROCESSED", "final_verdict": "DECLINED", "debate": [f"System: {early['reason']}"]}
 
-    initial_state = {"messages": [], "context": f"Disaster: {disaster['name']}", "user_request": req.description, "iteration": 0, "verdict": ""}
-    final_state = await graph.ainvoke(initial_state)
+    initial_state = {"messages": [], "context": f"Disaster: {disaster['name']}", "user_request": req.description, "iteration": 0, "verdict": "", "allocation": None}
+    try:
+        final_state = await graph.ainvoke(initial_state)
+    except Exception:
+        SCREENER.release(req.description, req.lat, req.lng)
+        raise
     verdict = final_state.get("verdict", "DECLINED")
+    if verdict != "VALID":
+        SCREENER.release(req.description, req.lat, req.lng)
+    allocation = final_state.get("allocation")
+    if ALLOCATE_IN_JUDGE and verdict == "VALID" and allocation is None:
+        allocation = fallback_allocation(req.description)
     
     aid_rec = None
     request_id = None
@@ -232,7 +280,7 @@ async def evaluate_aid(req: AidRequest):
 
                 # Kick off background verification → approval → delivery pipeline
                 asyncio.create_task(verify_and_approve(
-                    request_id, req.lat, req.lng, req.description, disaster['name']
+                    request_id, req.lat, req.lng, req.description, disaster['name'], allocation
                 ))
 
             except Exception as e:
@@ -250,13 +298,13 @@ async def evaluate_aid(req: AidRequest):
         "on_chain": on_chain,
     }
 
-async def verify_and_approve(request_id: int, lat: float, lng: float, description: str, disaster_name: str):
+async def verify_and_approve(request_id: int, lat: float, lng: float, description: str, disaster_name: str,
+                             allocation: Optional[Allocation] = None):
     """
     Background pipeline: verifyEvent → approveAid → scheduleDelivery.
     Runs after a VALID verdict creates an on-chain request.
     """
-    # Step 1: FDC event verification (mock proof)
-    await asyncio.sleep(3)  # simulate attestation delay
+    # Step 1: FDC event verification (batched attestation — waits for the round)
     verify_tx = await verify_event(request_id, lat, lng)
     if not verify_tx:
         logger.error(f"Pipeline #{request_id}: verifyEvent failed — stopping")
@@ -265,38 +313,60 @@ async def verify_and_approve(request_id: int, lat: float, lng: float, descriptio
 
     # Step 2: LLM allocation decision → approveAid
     await asyncio.sleep(2)  # small delay for realism
-    approve_tx = await run_approval(request_id, lat, lng, description, disaster_name)
+    if allocation is None:
+        allocation = await decide_allocation(lat, lng, description, disaster_name)
+    approve_tx = await run_approval(request_id, allocation)
     if not approve_tx:
         logger.error(f"Pipeline #{request_id}: approveAid failed — stopping")
         return
     logger.info(f"Pipeline #{request_id}: aid approved")
 
-    # Step 3: Schedule simulated delivery → confirmDelivery → payout
-    asyncio.create_task(schedule_delivery(request_id))
+    # Step 3: Hand off to the fleet scheduler → confirmDelivery → payout
+    schedule_delivery(request_id, lat, lng, allocation.provider_type.value)
     logger.info(f"Pipeline #{request_id}: delivery scheduled")
 
 
 @app.get("/request-status/{request_id}")
-async def request_status(request_id: int):
+async def request_status(request: Request, request_id: int):
     """Read on-chain request status from MissionControl."""
     if not is_chain_configured():
         raise HTTPException(status_code=503, detail="Chain not configured")
     try:
         data = get_request_status(request_id)
-        return data
+        return content_response(request, data)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.get("/deliveries/{request_id}")
+async def delivery_status(request_id: int):
+    """Live status, ETA and unit position of a simulated delivery."""
+    data = SCHEDULER.status(request_id)
+    if data is None:
+        raise HTTPException(status_code=404, detail="Delivery not found")
+    return data
+
+
+@app.get("/fleet")
+async def get_fleet():
+    return SCHEDULER.fleet()
+
+
+@app.get("/screening-stats")
+async def screening_stats():
+    """Per-rule counters for the pre-debate screening stage."""
+    return SCREENER.stats()
+
+
 @app.get("/on-chain-events")
-async def get_on_chain_events():
-    return ON_CHAIN_EVENTS
+async def get_on_chain_events(request: Request):
+    return versioned_response(request, f"events-{on_chain_events_version()}", lambda: ON_CHAIN_EVENTS)
 
 
 @app.get("/evaluate-stream")
 async def evaluate_stream(request_text: str, context: str):
     async def stream():
-        state = {"messages": [], "context": context, "user_request": request_text, "iteration": 0, "verdict": ""}
+        state = {"messages": [], "context": context, "user_request": request_text, "iteration": 0, "verdict": "", "allocation": None}
         async for event in graph.astream(state):
             for node, output in event.items():
                 if "messages" in output:
@@ -0,0 +1,81 @@
+"""
+responses.py — Compact, cacheable responses for the dashboard endpoints.
+
+- Bodies are serialized with orjson (via FastAPI's ORJSONResponse).
+- Responses are compressed with brotli when brotli-asgi is installed and the
+  client accepts it, otherwise gzip. SSE streams are never compressed, since
+  buffering would stall the debate feed.
+- Polled endpoints carry an ETag; a matching If-None-Match gets an empty
+  304 so unchanged data is never re-serialized or re-sent.
+"""
+
+import uuid
+import hashlib
+import logging
+
+import orjson
+from fastapi import Request, Response
+from fastapi.responses import ORJSONResponse
+from starlette.middleware.gzip import GZipMiddleware
+
+try:
+    from brotli_asgi import BrotliMiddleware
+except ImportError:  # optional — gzip only
+    BrotliMiddleware = None
+
+logger = logging.getLogger("aegis.responses")
+
+# Bodies smaller than this are sent uncompressed
+COMPRESSION_MIN_BYTES = 500
+
+# Version counters restart at 0 with every process (and differ between
+# workers), so version ETags are scoped to this process.
+BOOT_ID = uuid.uuid4().hex[:12]
+
+
+class CompressionMiddleware:
+    """Brotli/gzip compression for every HTTP route except `exclude_paths`."""
+
+    def __init__(self, app, exclude_paths: tuple = ()):
+        self.app = app
+        self.exclude_paths = exclude_paths
+        if BrotliMiddleware is not None:
+            self.compressed = BrotliMiddleware(app, minimum_size=COMPRESSION_MIN_BYTES, gzip_fallback=True)
+        else:
+            self.compressed = GZipMiddleware(app, minimum_size=COMPRESSION_MIN_BYTES)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and scope["path"] not in self.exclude_paths:
+            await self.compressed(scope, receive, send)
+        else:
+            await self.app(scope, receive, send)
+
+
+def _etag_matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    tags = [t.strip() for t in header.split(",")]
+    return "*" in tags or etag in tags
+
+
+def versioned_response(request: Request, version: str, build) -> Response:
+    """
+    ETag keyed to a data version. `build()` is only called (and the body only
+    serialized) when the client's cached copy is stale.
+    """
+    etag = f'W/"{BOOT_ID}-{version}"'
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if _etag_matches(request, etag):
+        return Response(status_code=304, headers=headers)
+    return ORJSONResponse(build(), headers=headers)
+
+
+def content_response(request: Request, payload) -> Response:
+    """ETag from the serialized body, for data without a version counter."""
+    body = orjson.dumps(payload)
+    etag = f'"{hashlib.blake2b(body, digest_size=8).hexdigest()}"'
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if _etag_matches(request, etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
@@ -0,0 +1,112 @@
+"""
+screening.py — Cheap pre-debate screening of aid requests.
+
+Runs before the 5-agent debate + judge (six LLM calls) and rejects the cases
+that can be decided locally: out-of-zone coordinates, financial requests,
+obvious spam and duplicate submissions of the same request. All text rules
+are folded into a single compiled regex, so a description is scanned once
+no matter how many rules are configured.
+"""
+
+import re
+import time
+import logging
+from collections import Counter
+
+logger = logging.getLogger("aegis.screening")
+
+# Text rules: name → literal keywords and/or raw regex patterns, plus the
+# reason shown to the requester. Matching is case-insensitive substring.
+SCREENING_RULES = {
+    "money": {
+        "keywords": ["money", "cash", "payment", "fund", "donate", "dollar", "euro", "pound", "£", "$", "€", "bitcoin", "crypto"],
+        "reason": "Financial requests are not permitted.",
+    },
+    "spam": {
+        "keywords": ["http://", "https://", "www.", "click here", "subscribe", "casino", "lottery", "viagra", "free followers"],
+        "patterns": [r"(?P<rep>[a-z0-9])(?P=rep){9,}"],  # same letter/digit 10+ times
+        "reason": "Request looks like spam.",
+    },
+}
+
+# The same description from the same coordinates (rounded to ~11m) resubmitted
+# within this window is rejected while the first one is still being debated
+DUPLICATE_WINDOW_SECONDS = 120
+DUPLICATE_COORD_DECIMALS = 4
+MIN_DESCRIPTION_CHARS = 3
+
+
+def _compile_rules(rules: dict) -> re.Pattern | None:
+    """Fold every rule into one alternation with a named group per rule."""
+    branches = []
+    for name, rule in rules.items():
+        parts = [re.escape(kw) for kw in rule.get("keywords", [])] + list(rule.get("patterns", []))
+        if parts:
+            branches.append(f"(?P<{name}>{'|'.join(parts)})")
+    return re.compile("|".join(branches), re.IGNORECASE) if branches else None
+
+
+def _duplicate_key(description: str, lat: float, lng: float) -> tuple:
+    text = " ".join(re.findall(r"[a-z0-9]+", description.lower()))
+    return round(lat, DUPLICATE_COORD_DECIMALS), round(lng, DUPLICATE_COORD_DECIMALS), text
+
+
+class Screener:
+    """
+    Pre-debate rule engine. `screen()` returns None if the request should go
+    to the debate, or an early verdict {"rule": ..., "reason": ...}.
+    """
+
+    def __init__(self, rules: dict = SCREENING_RULES, duplicate_window: float = DUPLICATE_WINDOW_SECONDS):
+        self.rules = rules
+        self.matcher = _compile_rules(rules)
+        self.duplicate_window = duplicate_window
+        self.recent: dict = {}
+        self.counters: Counter = Counter()
+
+    def _reject(self, rule: str, reason: str) -> dict:
+        self.counters[rule] += 1
+        logger.info(f"Screening rejected request — rule={rule}: {reason}")
+        return {"rule": rule, "reason": reason}
+
+    def _is_duplicate(self, key: tuple, now: float) -> bool:
+        # Drop expired entries so the table only holds the live window
+        if len(self.recent) > 1024:
+            self.recent = {k: t for k, t in self.recent.items() if now - t < self.duplicate_window}
+        seen = self.recent.get(key)
+        return seen is not None and now - seen < self.duplicate_window
+
+    def screen(self, description: str, lat: float, lng: float,
+               distance_km: float | None = None, radius_km: float | None = None,
+               check_duplicates: bool = True) -> dict | None:
+        if distance_km is not None and radius_km is not None and distance_km > radius_km:
+            return self._reject("out_of_zone", f"Outside zone ({round(distance_km)}km away).")
+
+        if len(description.strip()) < MIN_DESCRIPTION_CHARS:
+            return self._reject("empty", "Request description is empty.")
+
+        if self.matcher:
+            match = self.matcher.search(description)
+            if match:
+                return self._reject(match.lastgroup, self.rules[match.lastgroup]["reason"])
+
+        if check_duplicates:
+            now = time.monotonic()
+            key = _duplicate_key(description, lat, lng)
+            if self._is_duplicate(key, now):
+                return self._reject("duplicate", "A request from this location is already being processed.")
+            # Only requests that reach the debate open a duplicate window
+            self.recent[key] = now
+
+        self.counters["passed"] += 1
+        return None
+
+    def release(self, description: str, lat: float, lng: float):
+        """Close a duplicate window early — the debate declined or failed, so a retry is legitimate."""
+        self.recent.pop(_duplicate_key(description, lat, lng), None)
+
+    def stats(self) -> dict:
+        return dict(self.counters)
+
+
+SCREENER = Screener()
@@ -0,0 +1,88 @@
+"""Tests for the allocation decision and its local fallback cost model."""
+
+import asyncio
+
+import pytest
+from pydantic import ValidationError
+
+import approval_flow
+from approval_flow import (
+    Allocation, JudgeDecision, ProviderType, Verdict,
+    classify_aid, fallback_allocation, decide_allocation, FALLBACK_COST_USD, FALLBACK_PROVIDER_COST_USD,
+)
+
+
+class FakeStructuredLLM:
+    """Stands in for ChatGroq: the structured runnable validates a canned JSON reply."""
+
+    def __init__(self, reply: str | Exception):
+        self.reply = reply
+
+    def with_structured_output(self, schema, method):
+        assert method == "json_mode"
+        return self
+
+    async def ainvoke(self, prompt):
+        if isinstance(self.reply, Exception):
+            raise self.reply
+        return Allocation.model_validate_json(self.reply)
+
+
+def use_llm(monkeypatch, reply):
+    monkeypatch.setattr(approval_flow, "_llm", lambda: FakeStructuredLLM(reply))
+
+
+@pytest.mark.parametrize("text, category", [
+    ("My father needs INSULIN", "medical"),
+    ("Family trapped under the collapsed wall", "rescue"),
+    ("We need blankets, it's cold", "shelter"),
+    ("No clean water left", "food_water"),
+    ("Please help", "general"),
+    # Categories are checked in order — medical wins over food/water
+    ("Need water and medicine", "medical"),
+])
+def test_classify_aid(text, category):
+    assert classify_aid(text) == category
+
+
+def test_fallback_allocation_uses_category_provider_and_cost():
+    allocation = fallback_allocation("Trapped in rubble")
+    assert allocation == Allocation(provider_type=ProviderType.HUMAN_TEAM,
+                                    cost_usd=FALLBACK_COST_USD[(ProviderType.HUMAN_TEAM, "rescue")])
+
+
+def test_fallback_allocation_with_forced_provider():
+    allocation = fallback_allocation("Trapped in rubble", ProviderType.DRONE)
+    assert allocation.provider_type is ProviderType.DRONE
+    assert allocation.cost_usd == FALLBACK_PROVIDER_COST_USD[ProviderType.DRONE]
+
+
+def test_every_fallback_cost_is_within_bounds():
+    for provider in ProviderType:
+        for category in ("medical", "rescue", "shelter", "food_water", "general"):
+            fallback_allocation(category, provider)  # validates cost bounds
+
+
+def test_decide_allocation_uses_structured_reply(monkeypatch):
+    use_llm(monkeypatch, '{"provider_type": "Ground Vehicle", "cost_usd": 140}')
+    allocation = asyncio.run(decide_allocation(39.47, -0.37, "Need tents", "Valencia Flood"))
+    assert allocation == Allocation(provider_type=ProviderType.GROUND_VEHICLE, cost_usd=140)
+
+
+@pytest.mark.parametrize("reply", [
+    RuntimeError("groq unavailable"),
+    '{"provider_type": "Helicopter", "cost_usd": 100}',
+    '{"provider_type": "Drone", "cost_usd": 9000}',
+    "not json",
+])
+def test_decide_allocation_falls_back(monkeypatch, reply):
+    use_llm(monkeypatch, reply)
+    allocation = asyncio.run(decide_allocation(39.47, -0.37, "Need insulin", "Valencia Flood"))
+    assert allocation == fallback_allocation("Need insulin")
+
+
+def test_judge_verdict_is_schema_checked():
+    decision = JudgeDecision.model_validate_json('{"verdict": "DECLINED"}')
+    assert decision.verdict is Verdict.DECLINED
+    with pytest.raises(ValidationError):
+        JudgeDecision.model_validate_json('{"verdict": "Probably valid?"}')
@@ -0,0 +1,162 @@
+"""Tests for send_tx nonce handling and failure classification."""
+
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+from web3.exceptions import TransactionNotFound
+
+import chain
+
+
+class FakeEth:
+    """Minimal node: mines a tx as soon as it is sent unless `drop` is set."""
+
+    def __init__(self, pending_nonce: int = 0):
+        self.pending_nonce = pending_nonce
+        self.gas_price = 100
+        self.sent = []
+        self.mined = {}
+        self.send_error = None
+        self.drop = False
+
+    def get_transaction_count(self, address, block):
+        return self.pending_nonce
+
+    def send_raw_transaction(self, raw):
+        self.sent.append(raw)
+        if self.send_error:
+            raise self.send_error
+        if not self.drop:
+            self.mined[raw["hash"]] = SimpleNamespace(status=1, transactionHash=raw["hash"], gasUsed=21000)
+            self.pending_nonce = max(self.pending_nonce, raw["nonce"] + 1)
+
+    def get_transaction_receipt(self, tx_hash):
+        if tx_hash not in self.mined:
+            raise TransactionNotFound("pending")
+        return self.mined[tx_hash]
+
+
+def _sign(tx):
+    tx_hash = f"0x{tx['nonce']:04x}{tx['gasPrice']:08x}".encode()
+    return SimpleNamespace(hash=tx_hash, raw_transaction={**tx, "hash": tx_hash})
+
+
+def _contract_fn(*args):
+    return SimpleNamespace(build_transaction=lambda params: dict(params))
+
+
+@pytest.fixture
+def eth(monkeypatch):
+    eth = FakeEth()
+    account = SimpleNamespace(address="0xoracle", sign_transaction=_sign)
+    monkeypatch.setattr(chain, "get_chain", lambda: (SimpleNamespace(eth=eth), account, None, None))
+    monkeypatch.setattr(chain, "_next_nonce", None)
+    monkeypatch.setattr(chain, "_live_nonces", set())
+    monkeypatch.setattr(chain, "_released_nonces", set())
+    monkeypatch.setattr(chain, "_nonce_lock", asyncio.Lock())
+    monkeypatch.setattr(chain, "RECEIPT_TIMEOUT_SECONDS", 0.05)
+    monkeypatch.setattr(chain, "RECEIPT_POLL_SECONDS", 0.01)
+    monkeypatch.setattr(chain, "BACKOFF_CAP_SECONDS", 0.01)
+    return eth
+
+
+def test_classify_tx_error():
+    assert chain.classify_tx_error(chain.TxTimeout("x")) == chain.TX_TIMEOUT
+    assert chain.classify_tx_error(ValueError("execution reverted: Invalid status")) == chain.TX_REVERTED
+    assert chain.classify_tx_error(ValueError("replacement transaction underpriced")) == chain.TX_UNDERPRICED
+    assert chain.classify_tx_error(ValueError("nonce too low")) == chain.TX_NONCE_TOO_LOW
+    assert chain.classify_tx_error(ValueError("already known")) == chain.TX_ALREADY_KNOWN
+    assert chain.classify_tx_error(ConnectionError("read timed out")) == chain.TX_UNKNOWN
+
+
+def test_nonce_resyncs_after_node_reset(eth):
+    async def run():
+        for _ in range(3):
+            await chain.send_tx(_contract_fn)
+        # Hardhat node restarted — the chain forgot every nonce we used
+        eth.pending_nonce = 0
+        return await chain.send_tx(_contract_fn)
+
+    asyncio.run(run())
+    assert [tx["nonce"] for tx in eth.sent] == [0, 1, 2, 0]
+    assert not chain._live_nonces
+
+
+def test_nonce_resyncs_after_dropped_tx(eth):
+    async def run():
+        eth.drop = True
+        with pytest.raises(chain.TxTimeout):
+            await chain.send_tx(_contract_fn, max_retries=1)
+        eth.drop = False
+        return await chain.send_tx(_contract_fn)
+
+    asyncio.run(run())
+    # The dropped nonce 0 is reused instead of leaving a gap behind it
+    assert [tx["nonce"] for tx in eth.sent] == [0, 0]
+
+
+def test_live_nonce_blocks_resync(eth):
+    async def run():
+        chain._next_nonce = 5
+        chain._live_nonces.add(4)  # another pipeline is still sending nonce 4
+        eth.pending_nonce = 3
+        return await chain._allocate_nonce(SimpleNamespace(eth=eth), "0xoracle")
+
+    assert asyncio.run(run()) == 5
+
+
+def test_ambiguous_send_error_keeps_nonce(eth):
+    eth.send_error = ConnectionError("read timed out")
+
+    async def run():
+        with pytest.raises(ConnectionError):
+            await chain.send_tx(_contract_fn, max_retries=2)
+
+    asyncio.run(run())
+    # The node may have accepted it — retried with the identical tx, never released
+    assert {tx["hash"] for tx in eth.sent} == {eth.sent[0]["hash"]}
+    assert not chain._released_nonces
+
+
+def test_rejected_send_releases_nonce(eth):
+    eth.send_error = ValueError("transaction underpriced")
+
+    async def run():
+        with pytest.raises(ValueError):
+            await chain.send_tx(_contract_fn, max_retries=2)
+
+    asyncio.run(run())
+    # Fee bumped on the same nonce, then released for reuse once definitively rejected
+    assert [tx["nonce"] for tx in eth.sent] == [0, 0]
+    assert eth.sent[1]["gasPrice"] > eth.sent[0]["gasPrice"]
+    assert chain._released_nonces == {0}
+
+
+def test_timeout_bumps_fee_and_watches_original(eth):
+    eth.drop = True
+
+    async def run():
+        task = asyncio.create_task(chain.send_tx(_contract_fn))
+        while len(eth.sent) < 2:
+            await asyncio.sleep(0.005)
+        # The original hash gets mined after the replacement was sent
+        original = eth.sent[0]
+        eth.mined[original["hash"]] = SimpleNamespace(status=1, transactionHash=original["hash"], gasUsed=1)
+        return await task, original
+
+    receipt, original = asyncio.run(run())
+    assert receipt.transactionHash == original["hash"]
+    assert eth.sent[1]["nonce"] == original["nonce"]
+    assert eth.sent[1]["gasPrice"] > original["gasPrice"]
+
+
+def test_revert_is_not_retried(eth):
+    def reverting_send(raw):
+        eth.sent.append(raw)
+        eth.mined[raw["hash"]] = SimpleNamespace(status=0, transactionHash=raw["hash"], gasUsed=1)
+
+    eth.send_raw_transaction = reverting_send
+    with pytest.raises(chain.TxReverted):
+        asyncio.run(chain.send_tx(_contract_fn))
+    assert len(eth.sent) == 1
@@ -0,0 +1,138 @@
+"""Tests for the simulated delivery fleet scheduler."""
+
+import asyncio
+
+import pytest
+
+import delivery_monitor
+from delivery_monitor import DeliveryScheduler
+
+OXFORD = (51.7520, -1.2577)
+TOKYO = (35.6762, 139.6503)
+
+
+@pytest.fixture(autouse=True)
+def fast_clock(monkeypatch):
+    confirmed = []
+
+    async def fake_confirm(request_id):
+        confirmed.append(request_id)
+        return f"0x{request_id:04x}"
+
+    monkeypatch.setattr(delivery_monitor, "confirm_delivery", fake_confirm)
+    monkeypatch.setattr(delivery_monitor, "MIN_DELIVERY_SECONDS", 0.02)
+    monkeypatch.setattr(delivery_monitor, "MAX_DELIVERY_SECONDS", 0.05)
+    return confirmed
+
+
+def test_nearest_free_unit_is_dispatched():
+    async def run():
+        scheduler = DeliveryScheduler([
+            ("D-OX", "Drone", *OXFORD),
+            ("D-TK", "Drone", *TOKYO),
+        ])
+        return scheduler.schedule(1, 51.76, -1.26, "Drone")
+
+    assert asyncio.run(run())["unit_id"] == "D-OX"
+
+
+def test_unit_returns_to_base_before_next_job(fast_clock):
+    async def run():
+        scheduler = DeliveryScheduler([("D-OX", "Drone", *OXFORD)])
+        far = scheduler.schedule(1, *TOKYO, "Drone")
+        near = scheduler.schedule(2, 51.76, -1.26, "Drone")
+        assert near["status"] == "QUEUED"
+
+        while scheduler.deliveries[1]["status"] == "EN_ROUTE":
+            await asyncio.sleep(0.005)
+        # Delivered, but the drone is still flying home — the slot stays taken
+        assert scheduler.units["D-OX"]["active"] == 1
+        assert near["status"] == "QUEUED"
+
+        while near["status"] == "QUEUED":
+            await asyncio.sleep(0.005)
+        unit = scheduler.units["D-OX"]
+        return far, near, unit
+
+    far, near, unit = asyncio.run(run())
+    assert (unit["lat"], unit["lng"]) == OXFORD
+    assert near["origin"] == OXFORD
+    assert near["distance_km"] < 5
+    assert near["eta"] >= far["returns_at"]
+
+
+def test_many_deliveries_share_one_task(fast_clock):
+    async def run():
+        fleet = [(f"GV-{i}", "Ground Vehicle", *OXFORD) for i in range(5)]
+        scheduler = DeliveryScheduler(fleet)
+        for i in range(200):
+            scheduler.schedule(i, 51.7 + i * 1e-3, -1.25, "Ground Vehicle")
+        task = scheduler._task
+        while len(fast_clock) < 200:
+            await asyncio.sleep(0.01)
+        assert scheduler._task is task
+        return scheduler
+
+    scheduler = asyncio.run(run())
+    assert all(d["status"] == "CONFIRMED" for d in scheduler.deliveries.values())
+
+
+def test_confirm_tasks_are_held_until_done(monkeypatch):
+    release = asyncio.Event()
+
+    async def slow_confirm(request_id):
+        await release.wait()
+        return "0xabc"
+
+    monkeypatch.setattr(delivery_monitor, "confirm_delivery", slow_confirm)
+
+    async def run():
+        scheduler = DeliveryScheduler([("D-OX", "Drone", *OXFORD)])
+        delivery = scheduler.schedule(1, 51.76, -1.26, "Drone")
+        while delivery["status"] == "EN_ROUTE":
+            await asyncio.sleep(0.005)
+        assert len(scheduler._confirms) == 1
+        release.set()
+        while delivery["status"] != "CONFIRMED":
+            await asyncio.sleep(0.005)
+        await asyncio.sleep(0)
+        return scheduler
+
+    assert asyncio.run(run())._confirms == set()
+
+
+def test_finished_deliveries_are_evicted_after_retention(monkeypatch, fast_clock):
+    monkeypatch.setattr(delivery_monitor, "DELIVERY_RETENTION_SECONDS", 0.1)
+
+    async def run():
+        scheduler = DeliveryScheduler([("GV", "Ground Vehicle", *OXFORD)])
+        scheduler.schedule(1, 51.76, -1.26, "Ground Vehicle")
+        while len(fast_clock) < 1:
+            await asyncio.sleep(0.005)
+        # Still queryable inside the retention window
+        assert scheduler.status(1)["status"] == "CONFIRMED"
+        await asyncio.sleep(0.15)
+        # Any later event wakes the scheduler, which prunes
+        scheduler.schedule(2, 51.76, -1.26, "Ground Vehicle")
+        await asyncio.sleep(0.01)
+        return scheduler
+
+    scheduler = asyncio.run(run())
+    assert scheduler.status(1) is None
+    assert 2 in scheduler.deliveries and not scheduler.finished
+
+
+def test_confirm_exception_marks_failed(monkeypatch):
+    async def broken(request_id):
+        raise RuntimeError("rpc down")
+
+    monkeypatch.setattr(delivery_monitor, "confirm_delivery", broken)
+
+    async def run():
+        scheduler = DeliveryScheduler([("D-OX", "Drone", *OXFORD)])
+        delivery = scheduler.schedule(1, 51.76, -1.26, "Drone")
+        while delivery["status"] in ("EN_ROUTE", "DELIVERED"):
+            await asyncio.sleep(0.005)
+        return delivery
+
+    assert asyncio.run(run())["status"] == "FAILED"
@@ -0,0 +1,394 @@
+"""Tests for the batching FDC attestation client."""
+
+import json
+import asyncio
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+import pytest
+from web3 import Web3
+
+import fdc_client
+from fdc_client import AttestationClient, FDC_PROTOCOL_ID, _merkle_tree
+
+
+def _process_proof(leaf: bytes, proof: list) -> bytes:
+    """OpenZeppelin MerkleProof.processProof — sorted-pair keccak."""
+    node = leaf
+    for sibling in proof:
+        pair = node + sibling if node < sibling else sibling + node
+        node = bytes(Web3.keccak(pair))
+    return node
+
+
+@pytest.fixture(autouse=True)
+def _demo_env(monkeypatch):
+    for var in ("FDC_HUB_ADDRESS", "FDC_RELAY_ADDRESS", "FDC_DA_LAYER_URL"):
+        monkeypatch.delenv(var, raising=False)
+    monkeypatch.setattr(fdc_client, "BATCH_WINDOW_SECONDS", 0.01)
+
+
+# ---------------------------------------------------------------------------
+# Merkle tree
+# ---------------------------------------------------------------------------
+@pytest.mark.parametrize("size", [1, 2, 3, 4, 5, 7, 8, 13])
+def test_merkle_proofs_verify(size):
+    leaves = [bytes(Web3.keccak(text=f"leaf-{i}")) for i in range(size)]
+    root, proofs = _merkle_tree(leaves)
+
+    for leaf, proof in zip(leaves, proofs):
+        assert _process_proof(leaf, proof) == root
+    if size == 1:
+        assert root == leaves[0] and proofs == [[]]
+
+
+def test_merkle_proof_rejects_wrong_leaf():
+    leaves = [bytes(Web3.keccak(text=f"leaf-{i}")) for i in range(5)]
+    root, proofs = _merkle_tree(leaves)
+    assert _process_proof(leaves[1], proofs[0]) != root
+
+
+# ---------------------------------------------------------------------------
+# Batching and fan-out
+# ---------------------------------------------------------------------------
+def test_concurrent_callers_share_one_attestation(monkeypatch):
+    client = AttestationClient()
+    batches = []
+    real_attest = client._attest
+
+    async def counting_attest(batch):
+        batches.append([key for key, _, _ in batch])
+        return await real_attest(batch)
+
+    monkeypatch.setattr(client, "_attest", counting_attest)
+
+    async def run():
+        same = [client.get_proof(7, "disaster_verified", 1.0, 2.0) for _ in range(5)]
+        others = [client.get_proof(i, "disaster_verified", 1.0, 2.0) for i in range(3)]
+        return await asyncio.gather(*same, *others)
+
+    results = asyncio.run(run())
+
+    assert len(batches) == 1
+    assert sorted(batches[0]) == sorted([(7, "disaster_verified"), (0, "disaster_verified"),
+                                         (1, "disaster_verified"), (2, "disaster_verified")])
+    assert all(r is results[0] for r in results[:5])
+    # Everything in one batch shares a root and each proof verifies against it
+    roots = {root for _, root, _ in results}
+    assert len(roots) == 1
+    for proof, root, leaf in results:
+        assert _process_proof(leaf, proof) == root
+    assert not client.inflight
+
+
+def test_cached_proof_skips_attestation(monkeypatch):
+    client = AttestationClient()
+    first = asyncio.run(client.get_proof(1, "delivery_confirmed"))
+
+    async def fail(batch):
+        raise AssertionError("should be served from cache")
+
+    monkeypatch.setattr(client, "_attest", fail)
+    assert asyncio.run(client.get_proof(1, "delivery_confirmed")) is first
+
+
+def test_batch_crash_reaches_every_waiter(monkeypatch):
+    client = AttestationClient()
+
+    async def boom(batch):
+        raise RuntimeError("chain unreachable")
+
+    monkeypatch.setattr(client, "_attest", boom)
+
+    async def run():
+        return await asyncio.gather(
+            client.get_proof(1, "disaster_verified"),
+            client.get_proof(1, "disaster_verified"),
+            client.get_proof(2, "disaster_verified"),
+            return_exceptions=True,
+        )
+
+    results = asyncio.run(run())
+    assert all(isinstance(r, RuntimeError) for r in results)
+    # Failures are not cached, so a later call can retry
+    assert not client.proofs and not client.inflight
+
+
+# ---------------------------------------------------------------------------
+# DA layer path — fake DA HTTP server + MockRelay double
+# ---------------------------------------------------------------------------
+class _Call:
+    def __init__(self, fn):
+        self.call = fn
+
+
+class FakeChain:
+    """Block clock shared by the hub and relay doubles; each relay poll moves it on."""
+
+    def __init__(self, round_id: int, offset: int = 10):
+        self.timestamp = fdc_client.FIRST_VOTING_ROUND_START_TS + round_id * fdc_client.VOTING_EPOCH_DURATION_SECONDS + offset
+        self.blocks: dict = {}
+        self.eth = self
+
+    def mine(self) -> int:
+        number = len(self.blocks) + 1
+        self.blocks[number] = self.timestamp
+        return number
+
+    def get_block(self, number: int):
+        return type("Block", (), {"timestamp": self.blocks[number]})
+
+
+class FakeFdcHub:
+    """Python double of MockFdcHub: records requestAttestation calls."""
+
+    def __init__(self, chain: FakeChain, reject: set = frozenset()):
+        self.chain = chain
+        self.reject = reject
+        self.requests = []
+        self.functions = self
+
+    def requestAttestation(self, data: bytes, value: int = 0):
+        if data in self.reject:
+            raise RuntimeError("execution reverted")
+        self.requests.append((data, value))
+        return type("Receipt", (), {"blockNumber": self.chain.mine()})
+
+
+async def _fake_send_tx(contract_fn, *args, value=0):
+    return contract_fn(*args, value=value)
+
+
+class FakeMockRelay:
+    """Python double of MockRelay in smart_contracts/contracts/Mocks.sol."""
+
+    def __init__(self, chain: FakeChain | None = None, poll_advance: int = 40):
+        self.merkleRoots_: dict = {}
+        self.chain = chain
+        self.poll_advance = poll_advance
+        self.polls = 0
+        self.functions = self
+
+    def isFinalized(self, protocol_id: int, round_id: int):
+        def call():
+            self.polls += 1
+            self.chain.timestamp += self.poll_advance
+            round_end = fdc_client.FIRST_VOTING_ROUND_START_TS + (round_id + 1) * fdc_client.VOTING_EPOCH_DURATION_SECONDS
+            return self.chain.timestamp >= round_end
+        return _Call(call)
+
+    def setMerkleRoot(self, protocol_id: int, round_id: int, root: bytes):
+        self.merkleRoots_[(protocol_id, round_id)] = root
+
+    def merkleRoots(self, protocol_id: int, round_id: int):
+        root = self.merkleRoots_.get((protocol_id, round_id), b"\0" * 32)
+        return type("Call", (), {"call": staticmethod(lambda: root)})
+
+
+class FakeDaLayer:
+    """
+    Serves /api/v1/fdc/proof-by-request-round-raw for one finalized round:
+    each request gets a response, the round's tree is built over all of them,
+    and its root is published to the relay like the FDC protocol would.
+    """
+
+    def __init__(self, relay: FakeMockRelay, round_id: int, requests: list):
+        self.round_id = round_id
+        self.calls = []
+        self.responses = {
+            "0x" + data.hex(): "0x" + bytes(Web3.keccak(b"response:" + data)).hex()
+            for data in requests
+        }
+        self.order = list(self.responses)
+        leaves = [bytes(Web3.keccak(hexstr=self.responses[r])) for r in self.order]
+        root, self.proofs = _merkle_tree(leaves)
+        relay.setMerkleRoot(FDC_PROTOCOL_ID, round_id, root)
+
+        da = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                da.calls.append((self.path, body))
+                request_hex = body["requestBytes"]
+                if (self.path != "/api/v1/fdc/proof-by-request-round-raw"
+                        or body["votingRoundId"] != da.round_id or request_hex not in da.responses):
+                    self.send_response(404)
+                    self.end_headers()
+                    return
+                proof = da.proofs[da.order.index(request_hex)]
+                payload = json.dumps({
+                    "response_hex": da.responses[request_hex],
+                    "proof": ["0x" + p.hex() for p in proof],
+                }).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = HTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.mark.parametrize("size", [1, 2, 3])
+def test_round_proofs_from_da_layer(monkeypatch, size):
+    round_id = 1234
+    relay = FakeMockRelay()
+    items = [((i, "disaster_verified"), 1.0, 2.0, bytes(Web3.keccak(text=f"req-{i}"))) for i in range(size)]
+    da = FakeDaLayer(relay, round_id, [data for *_, data in items])
+    monkeypatch.setenv("FDC_DA_LAYER_URL", da.url)
+
+    client = AttestationClient()
+    monkeypatch.setattr(client, "_contract", lambda env_var, abi: relay)
+    try:
+        results = asyncio.run(client._round_proofs(round_id, items))
+    finally:
+        da.close()
+
+    assert len(da.calls) == size
+    root = relay.merkleRoots_[(FDC_PROTOCOL_ID, round_id)]
+    for key, *_ in items:
+        proof, result_root, leaf = results[key]
+        assert result_root == root
+        assert _process_proof(leaf, proof) == root
+
+
+def test_round_proofs_da_error_fails_only_that_request(monkeypatch):
+    relay = FakeMockRelay()
+    da = FakeDaLayer(relay, 1, [b"known"])
+    monkeypatch.setenv("FDC_DA_LAYER_URL", da.url)
+
+    client = AttestationClient()
+    monkeypatch.setattr(client, "_contract", lambda env_var, abi: relay)
+    items = [((1, "disaster_verified"), 0, 0, b"unknown"), ((2, "disaster_verified"), 0, 0, b"known")]
+    try:
+        results = asyncio.run(client._round_proofs(1, items))
+    finally:
+        da.close()
+
+    assert isinstance(results[(1, "disaster_verified")], Exception)
+    proof, root, leaf = results[(2, "disaster_verified")]
+    assert _process_proof(leaf, proof) == root
+
+
+# ---------------------------------------------------------------------------
+# Full attestation flow — _attest → send_tx → _round_of → _wait_finalized
+# ---------------------------------------------------------------------------
+@pytest.fixture
+def fdc_chain(monkeypatch):
+    """FdcHub/Relay doubles wired into the client, with FDC configured."""
+    round_id = 5000
+    chain = FakeChain(round_id)
+    relay = FakeMockRelay(chain)
+    hub = FakeFdcHub(chain)
+    contracts = {"FDC_HUB_ADDRESS": hub, "FDC_RELAY_ADDRESS": relay}
+
+    monkeypatch.setenv("FDC_HUB_ADDRESS", "0x" + "11" * 20)
+    monkeypatch.setenv("FDC_RELAY_ADDRESS", "0x" + "22" * 20)
+    monkeypatch.delenv("FDC_VERIFIER_URL", raising=False)
+    monkeypatch.setattr(fdc_client, "ROUND_POLL_SECONDS", 0.001)
+    monkeypatch.setattr(fdc_client, "send_tx", _fake_send_tx)
+    monkeypatch.setattr(fdc_client, "get_chain", lambda: (chain, None, None, None))
+    monkeypatch.setattr(AttestationClient, "_contract", lambda self, env_var, abi: contracts[env_var])
+    return type("FdcChain", (), {"round_id": round_id, "chain": chain, "relay": relay, "hub": hub})
+
+
+def test_attest_one_failed_submission_spares_the_batch(fdc_chain):
+    failing = fdc_client._leaf(2, "disaster_verified", 1.0, 2.0)
+    fdc_chain.hub.reject = {failing}
+    client = AttestationClient()
+
+    async def run():
+        return await asyncio.gather(
+            *(client.get_proof(i, "disaster_verified", 1.0, 2.0) for i in range(4)),
+            return_exceptions=True,
+        )
+
+    results = asyncio.run(run())
+    assert isinstance(results[2], RuntimeError)
+    for i in (0, 1, 3):
+        proof, root, leaf = results[i]
+        assert _process_proof(leaf, proof) == root
+    assert set(client.proofs) == {(i, "disaster_verified") for i in (0, 1, 3)}
+
+
+def test_attest_one_rejected_prepare_spares_the_batch(fdc_chain, monkeypatch):
+    client = AttestationClient()
+    real_prepare = client._prepare_request
+
+    async def prepare(key, lat, lng):
+        if key[0] == 1:
+            raise RuntimeError("Verifier rejected request: INVALID")
+        return await real_prepare(key, lat, lng)
+
+    monkeypatch.setattr(client, "_prepare_request", prepare)
+
+    async def run():
+        return await asyncio.gather(
+            *(client.get_proof(i, "disaster_verified", 1.0, 2.0) for i in range(3)),
+            return_exceptions=True,
+        )
+
+    results = asyncio.run(run())
+    assert isinstance(results[1], RuntimeError)
+    assert not isinstance(results[0], Exception) and not isinstance(results[2], Exception)
+    assert len(fdc_chain.hub.requests) == 2
+
+
+def test_unfinalized_round_times_out_and_fails_waiters(fdc_chain, monkeypatch):
+    # Relay never reaches the round end (e.g. wrong round id / misconfigured relay)
+    fdc_chain.relay.poll_advance = 0
+    monkeypatch.setattr(fdc_client, "ROUND_FINALIZATION_TIMEOUT_SECONDS", 0.05)
+    client = AttestationClient()
+
+    async def run():
+        return await asyncio.gather(
+            client.get_proof(1, "disaster_verified", 1.0, 2.0),
+            client.get_proof(2, "disaster_verified", 1.0, 2.0),
+            return_exceptions=True,
+        )
+
+    results = asyncio.run(run())
+    assert all(isinstance(r, TimeoutError) for r in results)
+    assert not client.rounds and not client.inflight
+
+
+def test_attest_submits_waits_for_round_and_fetches_da_proofs(fdc_chain, monkeypatch):
+    disaster_keys = [(i, "disaster_verified") for i in range(3)]
+    requests = [fdc_client._leaf(*key, 1.0, 2.0) for key in disaster_keys]
+    da = FakeDaLayer(fdc_chain.relay, fdc_chain.round_id, requests)
+    monkeypatch.setenv("FDC_DA_LAYER_URL", da.url)
+    client = AttestationClient()
+
+    async def run():
+        return await asyncio.gather(
+            *(client.get_proof(*key, 1.0, 2.0) for key in disaster_keys),
+            client.get_proof(0, "delivery_confirmed"),
+        )
+
+    try:
+        *disaster, delivery = asyncio.run(run())
+    finally:
+        da.close()
+
+    # Only the disaster checks went to the hub, all in one round
+    assert [data for data, _ in fdc_chain.hub.requests] == requests
+    assert fdc_chain.relay.polls >= 2
+    assert len(da.calls) == 3
+    root = fdc_chain.relay.merkleRoots_[(FDC_PROTOCOL_ID, fdc_chain.round_id)]
+    for proof, result_root, leaf in disaster:
+        assert result_root == root
+        assert _process_proof(leaf, proof) == root
+
+    # Delivery confirmation stays on the local demo tree
+    proof, demo_root, leaf = delivery
+    assert demo_root != root and leaf == fdc_client._leaf(0, "delivery_confirmed")
@@ -0,0 +1,96 @@
+"""Tests for the precomputed hazard grid."""
+
+import random
+
+import pytest
+from geopy.distance import geodesic
+
+from hazard_grid import HazardGrid, BAND_INSIDE, BAND_BOUNDARY
+
+DISASTERS = [
+    {"id": "d1", "name": "Valencia Flood", "lat": 39.4699, "lon": -0.3763, "radius": 30},
+    {"id": "d2", "name": "California Wildfire", "lat": 34.0522, "lon": -118.2437, "radius": 50},
+    {"id": "d3", "name": "Oxford Flash Flood", "lat": 51.7534, "lon": -1.2540, "radius": 100},
+    {"id": "d4", "name": "Antimeridian Quake", "lat": 10.0, "lon": 179.9, "radius": 100},
+]
+
+# Aftershock pair ~45km apart with the USGS default radius
+OVERLAPPING = [
+    {"id": "q1", "name": "Quake A", "lat": 38.0, "lon": 142.0, "radius": 100},
+    {"id": "q2", "name": "Quake B", "lat": 38.0, "lon": 142.51, "radius": 100},
+]
+
+
+@pytest.fixture
+def grid():
+    g = HazardGrid()
+    g.update(DISASTERS)
+    return g
+
+
+def test_nearest_matches_full_scan(grid):
+    rng = random.Random(7)
+    answered = 0
+    for _ in range(2000):
+        d = rng.choice(DISASTERS)
+        lat = d["lat"] + rng.uniform(-1.5, 1.5)
+        lng = d["lon"] + rng.uniform(-1.5, 1.5)
+        lng = (lng + 180) % 360 - 180
+        hit = grid.nearest(lat, lng)
+        if hit is None:
+            continue
+        answered += 1
+        best = min(DISASTERS, key=lambda x: geodesic((lat, lng), (x["lat"], x["lon"])).km)
+        assert hit[0]["id"] == best["id"]
+        assert hit[1] == pytest.approx(geodesic((lat, lng), (best["lat"], best["lon"])).km)
+    assert answered > 500
+
+
+def test_point_outside_reach_falls_back(grid):
+    assert grid.nearest(0.0, 0.0) is None
+
+
+def test_incremental_update_only_bumps_on_change(grid):
+    version = grid.version
+    grid.update(DISASTERS)
+    assert grid.version == version
+
+    grid.update(DISASTERS[:2])
+    assert grid.version == version + 1
+    assert "d3" not in grid.disasters and "d3" not in grid.footprints
+    assert all("d3" not in c for c in grid.cells.values())
+
+
+def test_revised_details_refresh_record_without_rebuilding_cells(grid):
+    version, cells = grid.version, {k: dict(v) for k, v in grid.cells.items()}
+    revised = [dict(DISASTERS[0], name="M 5.1 - Valencia Flood")] + DISASTERS[1:]
+    grid.update(revised)
+
+    assert grid.version == version + 1
+    assert grid.cells == cells
+    d, _ = grid.nearest(39.47, -0.38)
+    assert d["name"] == "M 5.1 - Valencia Flood"
+
+
+def test_per_disaster_tiles_cover_whole_zone_when_overlapping():
+    g = HazardGrid()
+    g.update([OVERLAPPING[0]])
+    alone = {(t["south"], t["west"]) for t in g.tiles("q1")}
+
+    g.update(OVERLAPPING)
+    together = {(t["south"], t["west"]) for t in g.tiles("q1")}
+    assert together == alone
+    assert all(t["disaster_id"] == "q1" for t in g.tiles("q1"))
+
+    # The unfiltered overlay still splits shared cells by nearest disaster
+    labelled = g.tiles()
+    assert {t["disaster_id"] for t in labelled} == {"q1", "q2"}
+    assert len({(t["south"], t["west"]) for t in labelled}) == len(labelled)
+
+
+def test_tile_bands(grid):
+    tiles = grid.tiles("d3")
+    assert {t["band"] for t in tiles} == {BAND_INSIDE, BAND_BOUNDARY}
+    centre = next(t for t in tiles if t["south"] <= 51.7534 < t["north"] and t["west"] <= -1.2540 < t["east"])
+    assert centre["band"] == BAND_INSIDE
+    assert grid.tiles("unknown") == []
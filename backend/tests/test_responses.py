@@ -0,0 +1,68 @@
+"""Tests for ETag/304 handling and compression."""
+
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+
+import responses
+from responses import CompressionMiddleware, versioned_response, content_response
+
+
+def _app(state: dict) -> FastAPI:
+    app = FastAPI()
+    app.add_middleware(CompressionMiddleware, exclude_paths=("/stream",))
+
+    @app.get("/versioned")
+    async def versioned(request: Request):
+        return versioned_response(request, f"data-{state['version']}", lambda: state["data"])
+
+    @app.get("/content")
+    async def content(request: Request):
+        return content_response(request, state["data"])
+
+    @app.get("/stream")
+    async def stream():
+        return state["data"]
+
+    return app
+
+
+def _client(**overrides):
+    state = {"version": 1, "data": [{"id": "d1", "name": "x" * 600}], **overrides}
+    return TestClient(_app(state)), state
+
+
+def test_versioned_304_until_version_changes():
+    client, state = _client()
+    first = client.get("/versioned")
+    etag = first.headers["etag"]
+    assert first.status_code == 200 and responses.BOOT_ID in etag
+
+    assert client.get("/versioned", headers={"If-None-Match": etag}).status_code == 304
+
+    state["version"] += 1
+    again = client.get("/versioned", headers={"If-None-Match": etag})
+    assert again.status_code == 200 and again.headers["etag"] != etag
+
+
+def test_versioned_etag_from_previous_process_is_stale(monkeypatch):
+    client, _ = _client()
+    etag = client.get("/versioned").headers["etag"]
+
+    # Restart: counters begin again from the same values, boot id differs
+    monkeypatch.setattr(responses, "BOOT_ID", "restarted")
+    assert client.get("/versioned", headers={"If-None-Match": etag}).status_code == 200
+
+
+def test_content_etag_tracks_body():
+    client, state = _client()
+    etag = client.get("/content").headers["etag"]
+    assert client.get("/content", headers={"If-None-Match": etag}).status_code == 304
+
+    state["data"] = [{"id": "d2"}]
+    assert client.get("/content", headers={"If-None-Match": etag}).status_code == 200
+
+
+def test_compression_skips_excluded_paths():
+    client, _ = _client()
+    assert client.get("/content", headers={"Accept-Encoding": "gzip"}).headers.get("content-encoding") == "gzip"
+    assert "content-encoding" not in client.get("/stream", headers={"Accept-Encoding": "gzip"}).headers
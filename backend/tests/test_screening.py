@@ -0,0 +1,91 @@
+"""Tests for the pre-debate screening rules."""
+
+import pytest
+
+import screening
+from screening import Screener
+
+OXFORD = (51.7520, -1.2577)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(screening.time, "monotonic", fake)
+    return fake
+
+
+def test_out_of_zone():
+    verdict = Screener().screen("Need water", *OXFORD, distance_km=120, radius_km=100)
+    assert verdict["rule"] == "out_of_zone"
+
+
+def test_empty_description():
+    assert Screener().screen("  ", *OXFORD)["rule"] == "empty"
+
+
+@pytest.mark.parametrize("text", ["Please send cash", "need $200 for rent", "Donate BITCOIN here"])
+def test_money_rule(text):
+    assert Screener().screen(text, *OXFORD)["rule"] == "money"
+
+
+@pytest.mark.parametrize("text", ["visit www.example.com", "click here for water", "aaaaaaaaaaaaaa", "1111111111 help"])
+def test_spam_rule(text):
+    assert Screener().screen(text, *OXFORD)["rule"] == "spam"
+
+
+@pytest.mark.parametrize("text", [
+    "HELP!!!!!!!!!! we are trapped under rubble",
+    "----------- help trapped",
+    "Need insulin and clean water for 3 children",
+])
+def test_genuine_requests_pass(text):
+    assert Screener().screen(text, *OXFORD) is None
+
+
+def test_duplicate_window_and_expiry(clock):
+    s = Screener(duplicate_window=120)
+    assert s.screen("Need water and blankets", *OXFORD) is None
+    # Same request again (case/punctuation differences don't matter)
+    clock.now += 60
+    assert s.screen("need water, and blankets!", *OXFORD)["rule"] == "duplicate"
+    # Someone else in the same shelter asking for something else is not a duplicate
+    assert s.screen("Insulin for my father", *OXFORD) is None
+
+    clock.now += 61
+    assert s.screen("Need water and blankets", *OXFORD) is None
+
+
+def test_release_allows_retry(clock):
+    s = Screener()
+    assert s.screen("Need water and blankets", *OXFORD) is None
+    s.release("Need water and blankets", *OXFORD)
+    assert s.screen("Need water and blankets", *OXFORD) is None
+
+
+def test_expired_entries_are_pruned(clock):
+    s = Screener(duplicate_window=10)
+    for i in range(1100):
+        s.screen(f"request {i}", *OXFORD)
+    clock.now += 11
+    s.screen("one more", *OXFORD)
+    assert len(s.recent) == 1
+
+
+def test_counters(clock):
+    s = Screener()
+    s.screen("Need water", *OXFORD)
+    s.screen("Need water", *OXFORD)
+    s.screen("send money", *OXFORD)
+    s.screen("casino", *OXFORD)
+    s.screen("", *OXFORD)
+    s.screen("Need water", *OXFORD, distance_km=5, radius_km=1)
+    assert s.stats() == {"passed": 1, "duplicate": 1, "money": 1, "spam": 1, "empty": 1, "out_of_zone": 1}
@@ -179,6 +179,7 @@ export default function Dashboard({
           <GoogleMapComponent
             userLocation={mapCenter}
             disasterZone={disasterZone}
+            disasterId={disaster?.id}
             className="h-full"
           />
         </div>
@@ -187,7 +188,11 @@ export default function Dashboard({
         <div className="w-1/2 flex flex-col gap-4 min-h-0">
           {/* Top — Drone Tracker */}
           <div className="flex-1 min-h-0 rounded-2xl border border-border bg-card overflow-hidden">
-             <DroneTracker active={droneActive} resetKey={droneResetKey} />
+             <DroneTracker
+               active={droneActive}
+               resetKey={droneResetKey}
+               requestId={evaluationResult?.on_chain ? evaluationResult.request_id : null}
+             />
           </div>
 
           {/* Bottom — Agent Debate */}
@@ -3,6 +3,8 @@
 import { useState, useEffect, useRef } from "react";
 import { motion, AnimatePresence } from "framer-motion";
 import { Navigation, MapPin, AlertTriangle, Package, CheckCircle2 } from "lucide-react";
+import { API_BASE } from "@/lib/types";
+import type { DeliveryStatus } from "@/lib/types";
 
 interface DroneEvent {
   id: string;
@@ -44,10 +46,13 @@ interface DroneTrackerProps {
   active?: boolean;
   /** Change this key to reset drone operations and run a fresh cycle. */
   resetKey?: number;
+  /** On-chain request id — when set, live unit position/ETA is polled from the fleet scheduler. */
+  requestId?: number | null;
 }
 
-export default function DroneTracker({ active = false, resetKey = 0 }: DroneTrackerProps) {
+export default function DroneTracker({ active = false, resetKey = 0, requestId = null }: DroneTrackerProps) {
   const [events, setEvents] = useState<DroneEvent[]>([]);
+  const [delivery, setDelivery] = useState<DeliveryStatus | null>(null);
   const scrollRef = useRef<HTMLDivElement>(null);
   const indexRef = useRef(0);
   const startedRef = useRef(false);
@@ -101,6 +106,33 @@ export default function DroneTracker({ active = false, resetKey = 0 }: DroneTrac
     return () => clearInterval(intervalId);
   }, [active, resetKey]);
 
+  // Live position + ETA from the backend fleet scheduler
+  useEffect(() => {
+    setDelivery(null);
+    if (!active || requestId == null) return;
+
+    const poll = async () => {
+      try {
+        const res = await fetch(`${API_BASE}/deliveries/${requestId}`);
+        if (!res.ok) return;
+        const data: DeliveryStatus = await res.json();
+        setDelivery(data);
+        if (data.eta_seconds !== null) {
+          window.dispatchEvent(
+            new CustomEvent("aegis-drone-eta", { detail: { eta: Math.ceil(data.eta_seconds / 60) } })
+          );
+        }
+        if (data.status === "CONFIRMED" || data.status === "FAILED") clearInterval(id);
+      } catch {
+        // Backend unreachable — keep the scripted feed
+      }
+    };
+
+    poll();
+    const id = setInterval(poll, 2000);
+    return () => clearInterval(id);
+  }, [active, requestId, resetKey]);
+
   useEffect(() => {
     if (scrollRef.current) {
       scrollRef.current.scrollTop = scrollRef.current.scrollHeight;
@@ -124,6 +156,19 @@ export default function DroneTracker({ active = false, resetKey = 0 }: DroneTrac
           </span>
         )}
       </div>
+      {delivery && (
+        <div className="flex items-center gap-2 px-4 py-2 border-b border-border text-[10px] font-mono text-slate-500">
+          <span className="font-semibold text-slate-700">{delivery.unit_id ?? delivery.provider_type}</span>
+          <span>{delivery.status}</span>
+          {delivery.position && (
+            <span>
+              {delivery.position.lat.toFixed(4)}, {delivery.position.lng.toFixed(4)} ·{" "}
+              {Math.round(delivery.position.progress * 100)}%
+            </span>
+          )}
+          {delivery.eta_seconds !== null && <span className="ml-auto">ETA {delivery.eta_seconds}s</span>}
+        </div>
+      )}
       <div ref={scrollRef} className="flex-1 overflow-y-auto px-4 py-2 space-y-2">
         {!active && events.length === 0 && (
           <div className="flex flex-col items-center justify-center h-full gap-2 text-center">
@@ -1,7 +1,9 @@
 "use client";
 
-import { GoogleMap, useJsApiLoader, MarkerF, CircleF } from "@react-google-maps/api";
-import { useMemo } from "react";
+import { GoogleMap, useJsApiLoader, MarkerF, CircleF, RectangleF } from "@react-google-maps/api";
+import { useEffect, useMemo, useState } from "react";
+import { API_BASE } from "@/lib/types";
+import type { HazardTile, HazardTilesResponse } from "@/lib/types";
 
 // Silver/desaturated map style — matches minimal aesthetic
 const MAP_STYLES = [
@@ -28,6 +30,8 @@ const MAP_STYLES = [
 interface GoogleMapComponentProps {
   userLocation: { lat: number; lng: number };
   disasterZone?: { lat: number; lng: number; radius: number };
+  /** When set, draws the backend's precomputed hazard tiles for this disaster instead of a circle. */
+  disasterId?: string;
   className?: string;
 }
 
@@ -36,6 +40,7 @@ const GOOGLE_MAPS_API_KEY = process.env.NEXT_PUBLIC_GOOGLE_MAPS_API_KEY || "YOUR
 export default function GoogleMapComponent({
   userLocation,
   disasterZone,
+  disasterId,
   className = "",
 }: GoogleMapComponentProps) {
   const { isLoaded } = useJsApiLoader({
@@ -43,6 +48,22 @@ export default function GoogleMapComponent({
     googleMapsApiKey: GOOGLE_MAPS_API_KEY,
   });
 
+  const [hazardTiles, setHazardTiles] = useState<HazardTile[]>([]);
+  useEffect(() => {
+    setHazardTiles([]);
+    if (!disasterId) return;
+    let cancelled = false;
+    fetch(`${API_BASE}/hazard-tiles?disaster_id=${encodeURIComponent(disasterId)}`)
+      .then((res) => (res.ok ? res.json() : null))
+      .then((data: HazardTilesResponse | null) => {
+        if (!cancelled && data) setHazardTiles(data.tiles);
+      })
+      .catch(() => {});
+    return () => {
+      cancelled = true;
+    };
+  }, [disasterId]);
+
   const mapOptions = useMemo(
     () => ({
       styles: MAP_STYLES,
@@ -87,14 +108,28 @@ export default function GoogleMapComponent({
           }}
         />
 
-        {/* Disaster zone — red circle overlay */}
+        {/* Disaster zone — precomputed hazard tiles from the backend */}
+        {hazardTiles.map((tile) => (
+          <RectangleF
+            key={`${tile.south},${tile.west}`}
+            bounds={{ north: tile.north, south: tile.south, east: tile.east, west: tile.west }}
+            options={{
+              fillColor: "#f43f5e",
+              fillOpacity: tile.band === "inside" ? 0.08 : 0.04,
+              strokeWeight: 0,
+              clickable: false,
+            }}
+          />
+        ))}
+
+        {/* Disaster zone — exact radius outline; filled only when no tiles are available */}
         {disasterZone && (
           <CircleF
             center={{ lat: disasterZone.lat, lng: disasterZone.lng }}
             radius={disasterZone.radius}
             options={{
               fillColor: "#f43f5e",
-              fillOpacity: 0.08,
+              fillOpacity: hazardTiles.length === 0 ? 0.08 : 0,
               strokeColor: "#f43f5e",
               strokeOpacity: 0.3,
               strokeWeight: 2,
@@ -18,6 +18,33 @@ export interface NearbyResponse {
   location_name?: string;
 }
 
+export interface HazardTile {
+  disaster_id: string;
+  band: "inside" | "boundary";
+  south: number;
+  west: number;
+  north: number;
+  east: number;
+}
+
+export interface HazardTilesResponse {
+  version: number;
+  cell_deg: number;
+  tiles: HazardTile[];
+}
+
+export interface DeliveryStatus {
+  request_id: number;
+  status: "QUEUED" | "EN_ROUTE" | "DELIVERED" | "CONFIRMED" | "FAILED";
+  provider_type: string;
+  unit_id: string | null;
+  distance_km: number | null;
+  eta_seconds: number | null;
+  position: { lat: number; lng: number; progress: number } | null;
+  destination: { lat: number; lng: number };
+  tx_hash: string | null;
+}
+
 export interface EvaluationResult {
   status: "PROCESSED" | "DECLINED";
   reason?: string;
@@ -58,4 +58,30 @@ contract MockFtsoRegistry {
     ) external view returns (uint256 _price, uint256 _timestamp, uint256 _decimals) {
         return (50000, block.timestamp, 5);
     }
-}
\ No newline at end of file
+}
+
+// 6. Mock FdcHub — accepts attestation requests and emits them for the backend
+contract MockFdcHub {
+    event AttestationRequest(bytes data, uint256 fee);
+
+    function requestAttestation(bytes calldata _data) external payable {
+        emit AttestationRequest(_data, msg.value);
+    }
+}
+
+// 7. Mock Relay — a voting round is finalized once its 90s epoch has ended
+contract MockRelay {
+    uint256 public constant FIRST_VOTING_ROUND_START_TS = 1658430000;
+    uint256 public constant VOTING_EPOCH_DURATION_SECONDS = 90;
+
+    mapping(uint256 => mapping(uint256 => bytes32)) public merkleRoots;
+
+    function setMerkleRoot(uint256 _protocolId, uint256 _votingRoundId, bytes32 _root) external {
+        merkleRoots[_protocolId][_votingRoundId] = _root;
+    }
+
+    function isFinalized(uint256 /* _protocolId */, uint256 _votingRoundId) external view returns (bool) {
+        uint256 roundEnd = FIRST_VOTING_ROUND_START_TS + (_votingRoundId + 1) * VOTING_EPOCH_DURATION_SECONDS;
+        return block.timestamp >= roundEnd;
+    }
+}
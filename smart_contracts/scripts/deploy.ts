@@ -36,6 +36,17 @@ async function main() {
   await mockRegistry.setContractAddress("FdcVerification", await fdc.getAddress());
   console.log("   → Registered FdcVerification in MockContractRegistry");
 
+  // Deploy Mock FdcHub + Relay so the backend attestation client can run end to end
+  const MockFdcHub = await ethers.getContractFactory("MockFdcHub");
+  const fdcHub = await MockFdcHub.deploy();
+  await fdcHub.waitForDeployment();
+  console.log("✅ MockFdcHub deployed to:", await fdcHub.getAddress());
+
+  const MockRelay = await ethers.getContractFactory("MockRelay");
+  const relay = await MockRelay.deploy();
+  await relay.waitForDeployment();
+  console.log("✅ MockRelay deployed to:", await relay.getAddress());
+
   // Deploy and register Mock FTSO Registry (for Treasury price feeds)
   const MockFtso = await ethers.getContractFactory("MockFtsoRegistry");
   const ftso = await MockFtso.deploy();
@@ -94,6 +105,8 @@ async function main() {
   console.log(`   MISSION_CONTROL_ADDRESS=${await missionControl.getAddress()}`);
   console.log(`   AID_TREASURY_ADDRESS=${await treasury.getAddress()}`);
   console.log(`   IDENTITY_REGISTRY_ADDRESS=${await identity.getAddress()}`);
+  console.log(`   FDC_HUB_ADDRESS=${await fdcHub.getAddress()}`);
+  console.log(`   FDC_RELAY_ADDRESS=${await relay.getAddress()}`);
 }
 
 main().catch((error) => {